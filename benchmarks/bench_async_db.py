@@ -0,0 +1,82 @@
+"""Compara a API entre dois commits, como antes e depois da migração para sessões assíncronas.
+
+Cria um `git worktree` de cada commit e roda o mesmo teste de carga
+(benchmarks.loadtest: FakeStore local, banco SQLite semeado, mistura de login,
+listagem de favoritos, produto e novo favorito) contra a aplicação de cada um.
+O relatório traz os dois resultados e, por endpoint, a razão depois/antes de
+p50, p95 e throughput.
+
+`--before` e `--after` aceitam quaisquer refs do git (por exemplo, o commit da
+migração e o seu pai). Os demais argumentos vão direto para o loadtest; com
+`--db-latency-ms` as queries ficam lentas e aparece o ganho de não bloquear o
+event loop, que no SQLite local (queries de microssegundos) não existe.
+
+Uso: python -m benchmarks.bench_async_db --before REF --after REF [--output result.json]
+                                        [-- --requests 2000 --concurrency 20 ...]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def git(*args: str) -> str:
+    return subprocess.check_output(["git", *args], cwd=ROOT, text=True).strip()
+
+
+def run_loadtest(app_dir: Path, output: Path, loadtest_args: list[str]) -> dict:
+    # O loadtest (e a semeadura do banco) é sempre o desta cópia; só a aplicação muda.
+    subprocess.run([sys.executable, "-m", "benchmarks.loadtest", "--app-dir", str(app_dir),
+                    "--output", str(output), *loadtest_args], cwd=ROOT, check=True)
+    return json.loads(output.read_text(encoding="utf-8"))
+
+
+def ratio(after: float, before: float) -> float | None:
+    return round(after / before, 2) if before else None
+
+
+def compare(before: dict, after: dict) -> dict:
+    return {
+        "throughput_rps": ratio(after["throughput_rps"], before["throughput_rps"]),
+        "endpoints": {
+            name: {
+                key: ratio(after["endpoints"][name][key], stats[key])
+                for key in ("p50_ms", "p95_ms", "throughput_rps")
+            }
+            for name, stats in before["endpoints"].items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--before", required=True, help="ref do git da versão de referência")
+    parser.add_argument("--after", required=True, help="ref do git da versão comparada")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args, loadtest_args = parser.parse_known_args()
+    loadtest_args = [arg for arg in loadtest_args if arg != "--"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, ref in (("before", args.before), ("after", args.after)):
+            tree = Path(tmp) / label
+            git("worktree", "add", "--detach", str(tree), ref)
+            try:
+                results[label] = run_loadtest(tree, Path(tmp) / f"{label}.json", loadtest_args)
+            finally:
+                git("worktree", "remove", "--force", str(tree))
+
+    report = {**results, "after_vs_before": compare(results["before"], results["after"])}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Mede a busca por título (`search_products`) num catálogo SQLite sintético.
+
+Compara o índice FTS5 com o filtro por substring (`LIKE '%termo%'`) em dois
+tipos de consulta: termos raros (o LIKE varre a tabela inteira) e pares de
+palavras comuns (muitos resultados; o FTS ordena todos por relevância, o LIKE
+para nos primeiros `limit` sem ranking).
+
+Uso: python -m benchmarks.bench_search [--products 50000] [--queries 200]
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.common import summarize
+from produtos_favoritos.database import Base, to_async_url
+from produtos_favoritos.models import Product
+from produtos_favoritos.search import search_products
+
+WORDS = ["cotton", "jacket", "slim", "fit", "shirt", "gold", "ring", "silver", "bracelet",
+         "backpack", "laptop", "sleeve", "rain", "womens", "mens", "casual", "premium",
+         "hard", "drive", "monitor", "gaming", "wireless", "leather", "boots", "dress"]
+
+
+def seed(url: str, products: int) -> None:
+    rng = random.Random(42)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rows = [{"id": i, "title": " ".join(rng.sample(WORDS, 4)) + f" {i}",
+             "image": "http://example.com/image.jpg", "price": 10.0}
+            for i in range(1, products + 1)]
+    with engine.begin() as conn:
+        conn.execute(insert(Product), rows)
+    engine.dispose()
+
+
+async def measure(url: str, workloads: dict[str, list[str]], limit: int) -> dict:
+    engine = create_async_engine(to_async_url(url))
+    results = {}
+    async with AsyncSession(engine) as db:
+        for name, run in (
+            ("fts", lambda q: search_products(db, q, 0, limit)),
+            ("like", lambda q: db.execute(select(Product).where(
+                *(Product.title.like(f"%{term}%") for term in q.split()))
+                .order_by(Product.id).limit(limit + 1))),
+        ):
+            for workload, queries in workloads.items():
+                latencies = []
+                for q in queries:
+                    start = time.perf_counter()
+                    await run(q)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                results[f"{name}_{workload}"] = summarize(latencies)
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(7)
+    workloads = {
+        "rare": [str(rng.randint(1, args.products)) for _ in range(args.queries)],
+        "common": [" ".join(rng.sample(WORDS, 2)) for _ in range(args.queries)],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'search.db'}"
+        seed(url, args.products)
+        results = asyncio.run(measure(url, workloads, args.limit))
+    print(json.dumps({"products": args.products, "queries": args.queries, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
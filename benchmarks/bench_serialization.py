@@ -0,0 +1,78 @@
+"""Compara a serialização padrão das listagens com o caminho rápido (`fast_json_responses`).
+
+Padrão: objetos/linhas revalidados contra o `response_model` (from_attributes),
+convertidos para tipos JSON e codificados com o `json` da stdlib, como o FastAPI faz.
+Rápido: linhas já no formato da resposta serializadas por `TypeAdapter.dump_json`.
+
+Uso: python -m benchmarks.bench_serialization [--rows 1000] [--repeat 20]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from produtos_favoritos.schemas import ClientRead, FavoriteRead, ProductRead
+from produtos_favoritos.serialization import CLIENT_LIST, FAVORITE_LIST
+
+CLIENT_READ_LIST = TypeAdapter(list[ClientRead])
+FAVORITE_READ_LIST = TypeAdapter(list[FavoriteRead])
+
+
+def fastapi_style(adapter: TypeAdapter, items: list) -> bytes:
+    value = adapter.validate_python(items, from_attributes=True)
+    content = adapter.dump_python(value, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode()
+
+
+def rows_per_second(fn, rows: int, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round(rows * repeat / (time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime(2024, 1, 1)
+    # ORM-like (acesso por atributo) para o caminho padrão; dicts para o rápido.
+    client_objs = [SimpleNamespace(id=i, name=f"Cliente {i}", email=f"c{i}@example.com",
+                                   role="user", created_at=now + timedelta(seconds=i))
+                   for i in range(args.rows)]
+    client_rows = [{"id": c.id, "name": c.name, "email": c.email, "role": c.role,
+                    "created_at": c.created_at} for c in client_objs]
+    products = [ProductRead(id=i, title=f"Produto {i}", image="http://example.com/image.jpg",
+                            price=10.5 + i, review="Rating: 4.1/5 (7 reviews)", last_sync=now)
+                for i in range(args.rows)]
+    favorites = [FavoriteRead(product=product, created_at=now) for product in products]
+    favorite_rows = [{"product": product, "created_at": now} for product in products]
+
+    assert json.loads(fastapi_style(CLIENT_READ_LIST, client_objs)) == json.loads(
+        CLIENT_LIST.dump_json(client_rows))
+    assert json.loads(fastapi_style(FAVORITE_READ_LIST, favorites)) == json.loads(
+        FAVORITE_LIST.dump_json(favorite_rows))
+
+    results = {}
+    for name, default, fast in (
+        ("clients", lambda: fastapi_style(CLIENT_READ_LIST, client_objs),
+         lambda: CLIENT_LIST.dump_json(client_rows)),
+        ("favorites", lambda: fastapi_style(FAVORITE_READ_LIST, favorites),
+         lambda: FAVORITE_LIST.dump_json(favorite_rows)),
+    ):
+        before = rows_per_second(default, args.rows, args.repeat)
+        after = rows_per_second(fast, args.rows, args.repeat)
+        results[name] = {"default_rows_per_s": before, "fast_rows_per_s": after,
+                         "speedup": round(after / before, 2)}
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Mede o tempo de cold start da API: import do app e tempo até o /health responder.
+
+Por padrão o DATABASE_URL aponta para um banco inacessível (SQLite num diretório
+inexistente), para mostrar que a inicialização não abre conexão: o schema vem
+das migrações e o engine só conecta na primeira requisição.
+
+Uso: python -m benchmarks.bench_startup [--runs 5] [--database-url URL]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import free_port, start_server, stop_server, summarize
+
+UNREACHABLE_DB = "sqlite:////inexistente/produtos_favoritos.db"
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import produtos_favoritos.main; "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+def measure_import(env: dict[str, str]) -> float:
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], env=env, text=True)
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_ready(env: dict[str, str]) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = start_server(
+        ["-m", "uvicorn", "produtos_favoritos.main:app", "--port", str(port),
+         "--log-level", "warning"],
+        env, f"http://127.0.0.1:{port}/health", poll_interval=0.005)
+    elapsed = (time.perf_counter() - start) * 1000
+    stop_server(process)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=UNREACHABLE_DB)
+    args = parser.parse_args()
+    env = {**os.environ, "DATABASE_URL": args.database_url}
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    ready = [measure_ready(env) for _ in range(args.runs)]
+    print(json.dumps({
+        "runs": args.runs,
+        "database_url": args.database_url,
+        **{f"import_{key}": value for key, value in summarize(imports).items()},
+        **{f"ready_{key}": value for key, value in summarize(ready).items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
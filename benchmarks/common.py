@@ -0,0 +1,51 @@
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies_ms: list[float]) -> dict[str, float]:
+    return {
+        f"{name}_ms": round(percentile(latencies_ms, pct), 2)
+        for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: list[str], env: dict[str, str], health_url: str, timeout: float = 30, poll_interval: float = 0.1) -> subprocess.Popen:
+    """Sobe um processo (uvicorn) e espera o health check responder."""
+    process = subprocess.Popen([sys.executable, *args], env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Processo terminou ao subir: {' '.join(args)}")
+        try:
+            if httpx.get(health_url, timeout=1).status_code < 500:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(poll_interval)
+    process.terminate()
+    raise RuntimeError(f"Timeout esperando {health_url}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
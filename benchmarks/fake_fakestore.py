@@ -0,0 +1,85 @@
+"""FakeStore API local para benchmarks, com latência, taxa de erro e tamanho do catálogo configuráveis.
+
+Uso: python -m benchmarks.fake_fakestore --port 8100 --latency-ms 50 --error-rate 0.01 --catalog-size 100
+"""
+import argparse
+import asyncio
+import os
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+
+def make_product(product_id: int) -> dict:
+    rng = random.Random(product_id)
+    return {
+        "id": product_id,
+        "title": f"Produto de benchmark {product_id}",
+        "price": round(rng.uniform(5, 500), 2),
+        "description": "Produto gerado para testes de carga.",
+        "category": rng.choice(["electronics", "jewelery", "men's clothing", "women's clothing"]),
+        "image": f"https://fakestore.local/img/{product_id}.jpg",
+        "rating": {"rate": round(rng.uniform(1, 5), 1), "count": rng.randint(0, 1000)},
+    }
+
+
+def create_app(latency_ms: float = 0, error_rate: float = 0.0, catalog_size: int = 20) -> Starlette:
+    catalog = {product_id: make_product(product_id)
+               for product_id in range(1, catalog_size + 1)}
+
+    async def simulate():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if error_rate and random.random() < error_rate:
+            return JSONResponse({"detail": "erro simulado"}, status_code=503)
+        return None
+
+    async def list_products(request):
+        return await simulate() or JSONResponse(list(catalog.values()))
+
+    async def get_product(request):
+        error = await simulate()
+        if error:
+            return error
+        product = catalog.get(request.path_params["product_id"])
+        if product is None:
+            # A FakeStore real responde 200 com corpo vazio para ids inexistentes.
+            return PlainTextResponse("")
+        return JSONResponse(product)
+
+    async def health(request):
+        return JSONResponse({"status": "ok"})
+
+    return Starlette(routes=[
+        Route("/products", list_products),
+        Route("/products/{product_id:int}", get_product),
+        Route("/health", health),
+    ])
+
+
+def app_from_env() -> Starlette:
+    """Fábrica para `uvicorn --factory`, configurada por variáveis de ambiente."""
+    return create_app(
+        latency_ms=float(os.environ.get("FAKESTORE_LATENCY_MS", 0)),
+        error_rate=float(os.environ.get("FAKESTORE_ERROR_RATE", 0)),
+        catalog_size=int(os.environ.get("FAKESTORE_CATALOG_SIZE", 20)),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--catalog-size", type=int, default=20)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.error_rate, args.catalog_size),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
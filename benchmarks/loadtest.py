@@ -0,0 +1,222 @@
+"""Teste de carga reproduzível da API contra uma FakeStore local.
+
+Sobe a FakeStore falsa (benchmarks.fake_fakestore) e a aplicação via uvicorn
+com um banco SQLite temporário, cria N clientes e M favoritos e dispara uma
+mistura ponderada de /auth/login, GET /favorites/, GET /products/{id} e
+POST /favorites/{id} com a concorrência pedida. O resultado (p50/p95/p99,
+erros e throughput por endpoint) sai em JSON para comparar commits.
+
+Com `--app-dir` a aplicação sobe a partir de outra cópia do repositório (por
+exemplo, um `git worktree` de um commit antigo), com o mesmo banco e a mesma
+carga; `--db-latency-ms` simula queries lentas (ver benchmarks.serve_app).
+
+Uso: python -m benchmarks.loadtest [--clients 50] [--favorites 5] [--requests 2000] [--concurrency 20]
+                                   [--latency-ms 20] [--error-rate 0] [--catalog-size 100] [--output result.json]
+                                   [--app-dir ../outra-copia] [--db-latency-ms 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import free_port, start_server, stop_server, summarize
+
+PASSWORD = "senha-benchmark"
+# Peso de cada cenário na mistura de requisições.
+SCENARIOS = {
+    "login": 1,
+    "list_favorites": 4,
+    "get_product": 4,
+    "add_favorite": 1,
+}
+
+
+def seed(args) -> list[dict]:
+    """Cria clientes e favoritos direto no banco, com um único hash bcrypt para todos."""
+    # Importado aqui: os módulos leem DATABASE_URL ao serem importados.
+    from alembic import command
+    from alembic.config import Config
+
+    from produtos_favoritos.database import SessionLocal, get_engine
+    from produtos_favoritos.models import Client, Favorite, Product
+    from produtos_favoritos.products_service import format_review, rating_values
+    from produtos_favoritos.security import create_access_token, hash_password
+
+    from benchmarks.fake_fakestore import make_product
+
+    command.upgrade(Config("alembic.ini"), "head")
+    rng = random.Random(args.seed)
+    password_hash = hash_password(PASSWORD)
+    favorites_by_client = [
+        rng.sample(range(1, args.catalog_size + 1), min(args.favorites, args.catalog_size))
+        for _ in range(args.clients)]
+    clients = []
+    with SessionLocal() as db:
+        # Só os produtos favoritados são semeados; os demais vêm da FakeStore na
+        # primeira consulta, exercitando o caminho de atualização.
+        for product_id in sorted(set().union(*favorites_by_client)):
+            data = make_product(product_id)
+            db.add(Product(id=product_id, title=data["title"], image=data["image"],
+                           price=data["price"], review=format_review(data),
+                           **rating_values(data)))
+        for i, favorites in enumerate(favorites_by_client):
+            client = Client(name=f"Cliente {i}", email=f"cliente{i}@bench.example.com",
+                            password_hash=password_hash)
+            db.add(client)
+            db.flush()
+            db.add_all(Favorite(client_id=client.id, product_id=product_id)
+                       for product_id in favorites)
+            clients.append({
+                "email": client.email,
+                "token": create_access_token(client.email, client.id),
+                "favorites": set(favorites),
+            })
+        db.commit()
+    get_engine().dispose()
+    return clients
+
+
+async def send(http: httpx.AsyncClient, scenario: str, client: dict, rng: random.Random, catalog_size: int) -> httpx.Response:
+    headers = {"Authorization": f"Bearer {client['token']}"}
+    if scenario == "login":
+        return await http.post("/auth/login", data={
+            "username": client["email"], "password": PASSWORD})
+    if scenario == "list_favorites":
+        return await http.get("/favorites/", headers=headers)
+    if scenario == "get_product":
+        return await http.get(f"/products/{rng.randint(1, catalog_size)}")
+    candidates = [product_id for product_id in range(1, catalog_size + 1)
+                  if product_id not in client["favorites"]]
+    product_id = rng.choice(candidates) if candidates else 1
+    client["favorites"].add(product_id)
+    return await http.post(f"/favorites/{product_id}", headers=headers)
+
+
+async def drive(base_url: str, clients: list[dict], args) -> dict:
+    rng = random.Random(args.seed)
+    names = list(SCENARIOS)
+    weights = list(SCENARIOS.values())
+    plan = rng.choices(names, weights=weights, k=args.requests)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+        async def request(scenario: str) -> None:
+            client = rng.choice(clients)
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    r = await send(http, scenario, client, rng, args.catalog_size)
+                except httpx.TransportError:
+                    errors[scenario] += 1
+                    return
+                finally:
+                    latencies[scenario].append((time.perf_counter() - start) * 1000)
+            # 409 é esperado quando o cliente já favoritou todo o catálogo.
+            if r.status_code >= 400 and not (scenario == "add_favorite" and r.status_code == 409):
+                errors[scenario] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request(scenario) for scenario in plan))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "endpoints": {
+            scenario: {
+                "requests": len(latencies[scenario]),
+                "errors": errors[scenario],
+                "throughput_rps": round(len(latencies[scenario]) / elapsed, 1),
+                **summarize(latencies[scenario]),
+            }
+            for scenario in names
+        },
+    }
+
+
+def git_commit(cwd: str | None = None) -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--favorites", type=int, default=5,
+                        help="favoritos semeados por cliente")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--catalog-size", type=int, default=100)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--app-dir", help="cópia do repositório de onde subir a aplicação (padrão: esta)")
+    parser.add_argument("--db-latency-ms", type=float, default=0,
+                        help="espera somada a cada comando no SQLite da aplicação")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_port, app_port = free_port(), free_port()
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{Path(tmp) / 'loadtest.db'}",
+            "FAKESTORE_BASE_URL": f"http://127.0.0.1:{fake_port}",
+            "FAKESTORE_LATENCY_MS": str(args.latency_ms),
+            "FAKESTORE_ERROR_RATE": str(args.error_rate),
+            "FAKESTORE_CATALOG_SIZE": str(args.catalog_size),
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "JWT_SECRET": "loadtest-secret",
+            # Toda a carga sai de um único IP; o limite mediria só os 429.
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        os.environ.update(env)
+        clients = seed(args)
+
+        fake = start_server(
+            ["-m", "uvicorn", "benchmarks.fake_fakestore:app_from_env", "--factory",
+             "--port", str(fake_port), "--log-level", "warning"],
+            env, f"http://127.0.0.1:{fake_port}/health")
+        try:
+            app = start_server(
+                ["-m", "benchmarks.serve_app", "--port", str(app_port),
+                 "--db-latency-ms", str(args.db_latency_ms),
+                 *(["--app-dir", args.app_dir] if args.app_dir else [])],
+                env, f"http://127.0.0.1:{app_port}/health")
+            try:
+                results = asyncio.run(
+                    drive(f"http://127.0.0.1:{app_port}", clients, args))
+            finally:
+                stop_server(app)
+        finally:
+            stop_server(fake)
+
+    report = {
+        "commit": git_commit(args.app_dir),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "app_dir")},
+        **results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
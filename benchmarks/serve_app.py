@@ -0,0 +1,45 @@
+"""Sobe a aplicação com uvicorn para os benchmarks.
+
+`--app-dir` importa `produtos_favoritos` de outra cópia do repositório (por
+exemplo, um `git worktree` de um commit antigo). `--db-latency-ms` soma uma
+espera a cada comando executado no SQLite, dentro do driver: com sessões
+síncronas ela bloqueia o event loop; com o aiosqlite, só a thread do driver.
+Assim uma query lenta pode ser simulada sem PostgreSQL.
+
+Uso: python -m benchmarks.serve_app --port 8000 [--app-dir ../outra-copia] [--db-latency-ms 5]
+"""
+import argparse
+import sys
+import time
+
+import uvicorn
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def add_db_latency(latency_ms: float) -> None:
+    def slow_statement(statement):
+        time.sleep(latency_ms / 1000)
+
+    @event.listens_for(Engine, "connect")
+    def connect(dbapi_connection, _):
+        # aiosqlite: a conexão sqlite3 real roda na thread do driver.
+        driver = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        getattr(driver, "_conn", driver).set_trace_callback(slow_statement)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--app-dir")
+    parser.add_argument("--db-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    if args.app_dir:
+        sys.path.insert(0, args.app_dir)
+    if args.db_latency_ms > 0:
+        add_db_latency(args.db_latency_ms)
+    uvicorn.run("produtos_favoritos.main:app", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
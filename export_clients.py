@@ -0,0 +1,29 @@
+"""Script para exportar clientes e favoritos em NDJSON.
+Uso: python export_clients.py [arquivo.ndjson | arquivo.ndjson.gz]   (sem arquivo, escreve na saída padrão)
+"""
+import asyncio
+import sys
+
+from produtos_favoritos.database import AsyncSessionLocal, dispose_engines
+from produtos_favoritos.export import iter_export_ndjson
+
+
+async def run(path: str | None):
+    gzip = bool(path and path.endswith(".gz"))
+    output = open(path, "wb") if path else sys.stdout.buffer
+    try:
+        async with AsyncSessionLocal() as db:
+            async for chunk in iter_export_ndjson(db, gzip=gzip):
+                output.write(chunk)
+    finally:
+        if path:
+            output.close()
+        await dispose_engines()
+
+
+def main():
+    asyncio.run(run(sys.argv[1] if len(sys.argv) > 1 else None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Script para importar clientes em massa de um CSV (name,email,password[,role]) ou NDJSON.
+Uso: python import_clients.py <arquivo.csv|arquivo.ndjson> [--workers N] [--batch-size N]
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from produtos_favoritos.bulk_import import (detect_format, import_clients,
+                                            process_pool_hasher, read_records)
+from produtos_favoritos.database import AsyncSessionLocal, dispose_engines
+
+
+def print_progress(result):
+    print(f"{result.processed} processados, {result.inserted} inseridos, "
+          f"{result.duplicates} duplicados, {result.invalid} inválidos "
+          f"({result.rows_per_second:.0f} linhas/s)", flush=True)
+
+
+async def run(args):
+    fmt = detect_format(args.path)
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream, \
+                ProcessPoolExecutor(args.workers) as executor:
+            async with AsyncSessionLocal() as db:
+                result = await import_clients(
+                    db, read_records(stream, fmt), process_pool_hasher(executor, args.workers),
+                    batch_size=args.batch_size, on_progress=print_progress)
+    finally:
+        await dispose_engines()
+    print(f"Importação concluída em {result.elapsed_seconds:.1f}s.")
+    for error in result.errors:
+        print(f"Linha {error.line}: {error.detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa clientes em massa.")
+    parser.add_argument("path")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Ambiente do Alembic: usa a DATABASE_URL da aplicação e os models como alvo."""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from produtos_favoritos import models  # noqa: F401  (registra as tabelas no Base)
+from produtos_favoritos.config import get_settings
+from produtos_favoritos.database import Base
+from produtos_favoritos.models import PRODUCTS_FTS_TABLE
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # A tabela FTS5 do SQLite (e suas tabelas internas) é criada pela migração 0002, fora dos models.
+    return not (type_ == "table" and name.startswith(PRODUCTS_FTS_TABLE))
+
+
+def database_url() -> str:
+    # `sqlalchemy.url` só é definida programaticamente (testes, benchmarks).
+    return config.get_main_option("sqlalchemy.url") or get_settings().database_url
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=database_url(), target_metadata=target_metadata,
+                      literal_binds=True, render_as_batch=True, include_name=include_name)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = create_engine(database_url())
+    try:
+        with engine.connect() as connection:
+            # render_as_batch: o SQLite não suporta ALTER TABLE completo.
+            context.configure(connection=connection, target_metadata=target_metadata,
+                              render_as_batch=True, include_name=include_name)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
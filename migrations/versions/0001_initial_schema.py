@@ -0,0 +1,62 @@
+"""Schema inicial: clients, products e favorites.
+
+É o schema que a aplicação criava com `create_all` antes das migrações.
+Bancos criados assim já o têm: marque-os com `alembic stamp 0001` e depois
+rode `alembic upgrade head` normalmente.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "clients",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("password_hash", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=20), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_clients_id", "clients", ["id"])
+    op.create_index("ix_clients_email", "clients", ["email"], unique=True)
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("image", sa.String(length=500), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("review", sa.String(length=1000), nullable=True),
+        sa.Column("last_sync", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+
+    op.create_table(
+        "favorites",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["client_id"], ["clients.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("client_id", "product_id", name="uq_client_product"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("favorites")
+    op.drop_table("products")
+    op.drop_table("clients")
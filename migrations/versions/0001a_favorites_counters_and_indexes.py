@@ -0,0 +1,37 @@
+"""Contadores de favoritos e índices de paginação.
+
+Adiciona `clients.favorites_updated_at` e `products.favorites_count`
+(recalculado a partir de `favorites`) e os índices compostos usados pela
+paginação por cursor e pelo ranking de populares.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("clients", sa.Column("favorites_updated_at", sa.DateTime(), nullable=True))
+    op.add_column("products", sa.Column("favorites_count", sa.Integer(),
+                                        server_default="0", nullable=False))
+    op.execute("UPDATE products SET favorites_count = "
+               "(SELECT count(*) FROM favorites WHERE favorites.product_id = products.id)")
+    op.create_index("ix_clients_created_at_id", "clients", ["created_at", "id"])
+    op.create_index("ix_products_favorites_count_id", "products", ["favorites_count", "id"])
+    op.create_index("ix_favorites_client_created_at_id", "favorites",
+                    ["client_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_favorites_client_created_at_id", table_name="favorites")
+    op.drop_index("ix_products_favorites_count_id", table_name="products")
+    op.drop_index("ix_clients_created_at_id", table_name="clients")
+    op.drop_column("products", "favorites_count")
+    op.drop_column("clients", "favorites_updated_at")
@@ -0,0 +1,49 @@
+"""Índice de busca textual nos títulos dos produtos.
+
+PostgreSQL: índice GIN sobre `to_tsvector('english', title)`.
+SQLite: tabela FTS5 `products_fts` mantida por triggers, populada com o catálogo atual.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE products_fts USING fts5(title, content='products', "
+    "content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, title) VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER products_fts_au AFTER UPDATE OF title ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+    "INSERT INTO products_fts(rowid, title) VALUES (new.id, new.title); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.create_index("ix_products_title_fts", "products",
+                        [sa.text("to_tsvector('english', title)")], postgresql_using="gin")
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_products_title_fts", table_name="products")
+    elif dialect == "sqlite":
+        for trigger in ("products_fts_ai", "products_fts_ad", "products_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS products_fts")
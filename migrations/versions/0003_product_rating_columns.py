@@ -0,0 +1,60 @@
+"""Colunas numéricas de avaliação e índices para navegar pelo catálogo.
+
+Adiciona `rating_rate` e `rating_count` (preenchidas a partir do texto de
+`review`, "Rating: x/5 (n reviews)") e os índices (price, id) e (rating_rate, id).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+REVIEW_RE = re.compile(r"Rating: ([0-9.]+)/5 \((\d+) reviews\)")
+BACKFILL_BATCH = 1000
+
+products = sa.table(
+    "products",
+    sa.column("id", sa.Integer),
+    sa.column("review", sa.String),
+    sa.column("rating_rate", sa.Float),
+    sa.column("rating_count", sa.Integer),
+)
+
+
+def backfill() -> None:
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(products.c.id, products.c.review)
+                        .where(products.c.review.is_not(None))).all()
+    values = []
+    for row in rows:
+        match = REVIEW_RE.fullmatch(row.review)
+        if match:
+            values.append({"product_id": row.id, "rate": float(match[1]), "count": int(match[2])})
+    update = (products.update().where(products.c.id == sa.bindparam("product_id"))
+              .values(rating_rate=sa.bindparam("rate"), rating_count=sa.bindparam("count")))
+    for start in range(0, len(values), BACKFILL_BATCH):
+        conn.execute(update, values[start:start + BACKFILL_BATCH])
+
+
+def upgrade() -> None:
+    # ADD COLUMN direto (sem batch): recriar a tabela no SQLite apagaria os triggers da busca.
+    op.add_column("products", sa.Column("rating_rate", sa.Float(), nullable=True))
+    op.add_column("products", sa.Column("rating_count", sa.Integer(), nullable=True))
+    op.create_index("ix_products_price_id", "products", ["price", "id"])
+    op.create_index("ix_products_rating_rate_id", "products", ["rating_rate", "id"])
+    backfill()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_rating_rate_id", table_name="products")
+    op.drop_index("ix_products_price_id", table_name="products")
+    op.drop_column("products", "rating_count")
+    op.drop_column("products", "rating_rate")
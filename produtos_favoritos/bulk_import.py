@@ -0,0 +1,180 @@
+"""Importação em lote de clientes a partir de CSV ou NDJSON.
+
+Cada lote de `import_batch_size` linhas é validado, tem os emails já cadastrados
+descobertos numa única query, as senhas hasheadas em paralelo e é gravado num
+único `INSERT ... ON CONFLICT DO NOTHING` com seu próprio commit.
+"""
+import asyncio
+import csv
+import json
+import logging
+import time
+from concurrent.futures import Executor
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, Iterator, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import Client
+from .schemas import ClientCreate, ClientImportError, ClientImportResult
+from .security import hash_password, hash_password_async, password_hasher
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+MAX_REPORTED_ERRORS = 100
+ROLES = ("user", "admin")
+
+HashBatch = Callable[[list[str]], Awaitable[list[str]]]
+
+
+def _add_error(result: ClientImportResult, line: int, detail: str) -> None:
+    result.invalid += 1
+    if len(result.errors) < MAX_REPORTED_ERRORS:
+        result.errors.append(ClientImportError(line=line, detail=detail))
+
+
+def _update_timing(result: ClientImportResult, start: float) -> None:
+    result.elapsed_seconds = round(time.perf_counter() - start, 3)
+    if result.elapsed_seconds:
+        result.rows_per_second = round(result.processed / result.elapsed_seconds, 1)
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict | None]]:
+    """Lê (número da linha, registro) de um CSV com cabeçalho ou de um NDJSON.
+
+    Linhas de NDJSON que não são um objeto JSON geram registro `None`.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_num, record if isinstance(record, dict) else None
+
+
+def detect_format(filename: str | None, content_type: str | None = None) -> str:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    return "ndjson"
+
+
+def hash_many(passwords: list[str]) -> list[str]:
+    """Hasheia uma fatia de senhas; roda dentro de um processo do pool."""
+    return [hash_password(password) for password in passwords]
+
+
+def process_pool_hasher(executor: Executor, workers: int) -> HashBatch:
+    """Divide cada lote de senhas entre os processos do pool."""
+    async def hash_batch(passwords: list[str]) -> list[str]:
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(passwords) // workers))
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(executor, hash_many, passwords[i:i + size])
+            for i in range(0, len(passwords), size)))
+        return [hashed for part in parts for hashed in part]
+    return hash_batch
+
+
+def thread_pool_hasher() -> HashBatch:
+    """Usa o pool de bcrypt da API, sem ocupar mais que seus workers (a fila fica para os logins)."""
+    semaphore = asyncio.Semaphore(password_hasher.max_workers)
+
+    async def hash_one(password: str) -> str:
+        async with semaphore:
+            return await hash_password_async(password)
+
+    async def hash_batch(passwords: list[str]) -> list[str]:
+        return list(await asyncio.gather(*(hash_one(password) for password in passwords)))
+    return hash_batch
+
+
+def _insert_ignoring_duplicates(db: AsyncSession):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(Client).on_conflict_do_nothing(index_elements=["email"])
+    if dialect == "sqlite":
+        return sqlite.insert(Client).on_conflict_do_nothing(index_elements=["email"])
+    return insert(Client)
+
+
+def _validate(line_num: int, record: dict | None, result: ClientImportResult) -> dict | None:
+    if record is None:
+        _add_error(result, line_num, "Linha inválida")
+        return None
+    try:
+        payload = ClientCreate.model_validate(record)
+    except ValidationError as exc:
+        fields = ", ".join(str(error["loc"][0]) for error in exc.errors() if error["loc"])
+        _add_error(result, line_num, f"Campos inválidos: {fields}")
+        return None
+    role = record.get("role") or "user"
+    if role not in ROLES:
+        _add_error(result, line_num, "Role inválida")
+        return None
+    return {"name": payload.name, "email": payload.email,
+            "password": payload.password, "role": role}
+
+
+async def import_clients(
+    db: AsyncSession,
+    records: Iterable[tuple[int, dict | None]],
+    hash_batch: HashBatch,
+    batch_size: int | None = None,
+    on_progress: Callable[[ClientImportResult], None] | None = None,
+) -> ClientImportResult:
+    batch_size = batch_size or settings.import_batch_size
+    result = ClientImportResult()
+    start = time.perf_counter()
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        result.processed += len(batch)
+        rows: dict[str, dict] = {}
+        for line_num, record in batch:
+            row = _validate(line_num, record, result)
+            if row is None:
+                continue
+            if row["email"] in rows:
+                result.duplicates += 1
+            else:
+                rows[row["email"]] = row
+
+        if rows:
+            existing = set((await db.execute(
+                select(Client.email).where(Client.email.in_(rows)))).scalars())
+            result.duplicates += len(existing)
+            new_rows = [row for email, row in rows.items() if email not in existing]
+        else:
+            new_rows = []
+        if new_rows:
+            hashes = await hash_batch([row.pop("password") for row in new_rows])
+            for row, password_hash in zip(new_rows, hashes):
+                row["password_hash"] = password_hash
+            inserted = (await db.execute(
+                _insert_ignoring_duplicates(db).values(new_rows).returning(Client.id))).all()
+            await db.commit()
+            # Emails inseridos por outra transação entre a checagem e o INSERT.
+            result.duplicates += len(new_rows) - len(inserted)
+            result.inserted += len(inserted)
+
+        _update_timing(result, start)
+        logger.info("Importação: %d processados, %d inseridos (%.0f linhas/s)",
+                    result.processed, result.inserted, result.rows_per_second)
+        if on_progress:
+            on_progress(result)
+    _update_timing(result, start)
+    return result
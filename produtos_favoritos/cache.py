@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Cache LRU em memória, limitado a `maxsize` itens, com expiração por item.
+
+    `expires_at` é um timestamp epoch (segundos). Seguro para uso a partir de
+    threads (rotas síncronas) e do event loop. `on_evict` é chamado a cada item
+    descartado por falta de espaço e `on_resize` com o novo tamanho, para
+    exportar métricas.
+    """
+
+    def __init__(self, maxsize: int, on_evict: Callable[[], None] | None = None,
+                 on_resize: Callable[[int], None] | None = None):
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.on_evict = on_evict
+        self.on_resize = on_resize
+
+    def _resized(self) -> None:
+        if self.on_resize is not None:
+            self.on_resize(len(self._data))
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.misses += 1
+                self._resized()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+                if self.on_evict is not None:
+                    self.on_evict()
+            self._resized()
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._resized()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+            self._resized()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+class CacheBackend(Generic[K, V]):
+    """Interface dos backends de cache de produtos.
+
+    `invalidate` remove a chave em todas as réplicas que compartilham o backend.
+    """
+
+    async def start(self) -> None:
+        """Inicia recursos de fundo (ex.: assinatura de invalidações)."""
+
+    async def close(self) -> None:
+        """Libera conexões e tarefas de fundo."""
+
+    async def get_many(self, keys: list[K]) -> dict[K, V]:
+        raise NotImplementedError
+
+    async def set(self, key: K, value: V, expires_at: float) -> None:
+        raise NotImplementedError
+
+    async def invalidate(self, key: K) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Limpa o que está em memória neste processo."""
+
+    def stats(self) -> dict[str, int]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend[K, V]):
+    """Backend local ao processo: um `LRUCache` com os objetos já prontos."""
+
+    def __init__(self, maxsize: int, on_evict: Callable[[], None] | None = None,
+                 on_resize: Callable[[int], None] | None = None):
+        self.local: LRUCache[K, V] = LRUCache(maxsize, on_evict, on_resize)
+
+    async def get_many(self, keys: list[K]) -> dict[K, V]:
+        found = {}
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set(self, key: K, value: V, expires_at: float) -> None:
+        self.local.set(key, value, expires_at)
+
+    async def invalidate(self, key: K) -> None:
+        self.local.invalidate(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self.local.stats()
+
+
+class RedisCacheBackend(MemoryCacheBackend[K, V]):
+    """Backend compartilhado entre réplicas no Redis, com um near-cache local na frente.
+
+    Os valores são gravados serializados (`encode`/`decode`) com TTL. Faltas no
+    near-cache são buscadas num único pipeline; invalidações são publicadas no
+    canal `<prefix>:invalidate` e removem a chave do near-cache de todas as
+    réplicas. O near-cache guarda cada item por no máximo `local_ttl` segundos,
+    o que limita a defasagem se alguma mensagem de invalidação se perder.
+
+    Falhas do Redis não derrubam as requisições: são registradas no log e a
+    leitura fica com o near-cache (e, na falta, o banco). A assinatura do canal
+    é refeita com backoff exponencial, e o near-cache é limpo ao reconectar,
+    já que invalidações podem ter se perdido nesse intervalo.
+    """
+
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self, url: str, prefix: str, encode: Callable[[V], bytes], decode: Callable[[bytes], V],
+                 key_type: Callable[[str], K], local_maxsize: int, local_ttl: float,
+                 on_evict: Callable[[], None] | None = None,
+                 on_resize: Callable[[int], None] | None = None):
+        try:
+            import redis.asyncio as redis
+            from redis.exceptions import RedisError
+        except ImportError as exc:
+            raise RuntimeError(
+                'CACHE_BACKEND=redis requer o pacote redis: pip install "redis>=5"') from exc
+        super().__init__(local_maxsize, on_evict, on_resize)
+        self.errors = (RedisError, OSError)
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidate"
+        self.encode = encode
+        self.decode = decode
+        self.key_type = key_type
+        self.local_ttl = local_ttl
+        self._listener: asyncio.Task | None = None
+
+    def _redis_key(self, key: K) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def start(self) -> None:
+        # Não espera o Redis: sem ele a aplicação sobe e a assinatura é refeita em background.
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        delay = self.RECONNECT_MIN_SECONDS
+        lost = False
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                if lost:
+                    logger.info("Assinatura de invalidação do cache restabelecida")
+                    self.local.clear()
+                    lost = False
+                delay = self.RECONNECT_MIN_SECONDS
+                async for message in pubsub.listen():
+                    self.local.invalidate(self.key_type(message["data"].decode()))
+                lost = True
+            except self.errors as exc:
+                logger.warning("Assinatura de invalidação do cache perdida, nova tentativa em %.1fs: %r",
+                               delay, exc)
+                lost = True
+            finally:
+                try:
+                    await pubsub.aclose()
+                except self.errors:
+                    pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.redis.aclose()
+
+    async def get_many(self, keys: list[K]) -> dict[K, V]:
+        found = await super().get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.get(self._redis_key(key))
+                    pipe.pttl(self._redis_key(key))
+                replies = await pipe.execute()
+        except self.errors as exc:
+            logger.warning("Redis indisponível, lendo do banco: %r", exc)
+            return found
+        now = time.time()
+        for key, raw, ttl_ms in zip(missing, replies[::2], replies[1::2]):
+            if raw is None:
+                continue
+            value = self.decode(raw)
+            found[key] = value
+            remaining = ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else self.local_ttl
+            self.local.set(key, value, now + min(remaining, self.local_ttl))
+        return found
+
+    async def set(self, key: K, value: V, expires_at: float) -> None:
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        self.local.set(key, value, min(expires_at, time.time() + self.local_ttl))
+        try:
+            await self.redis.set(self._redis_key(key), self.encode(value), px=ttl_ms)
+        except self.errors as exc:
+            logger.warning("Redis indisponível, item %s só no near-cache: %r", key, exc)
+
+    async def invalidate(self, key: K) -> None:
+        self.local.invalidate(key)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(self._redis_key(key))
+                pipe.publish(self.channel, str(key))
+                await pipe.execute()
+        except self.errors as exc:
+            # A cópia no Redis e nas outras réplicas vale até o próprio TTL.
+            logger.warning("Falha ao invalidar o item %s no Redis: %r", key, exc)
@@ -0,0 +1,50 @@
+"""Navegação pelo catálogo local: filtros por preço e avaliação, ordenação e cursor.
+
+Cada ordenação tem um índice composto (coluna, id) que atende o ORDER BY e o
+cursor keyset. Ordenar ou filtrar por avaliação deixa de fora os produtos sem
+avaliação (`rating_rate` nulo).
+"""
+from typing import Literal
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Product
+from .pagination import decode_keyset_cursor, encode_keyset_cursor
+
+CatalogSort = Literal["id", "price", "-price", "rating", "-rating"]
+SORT_COLUMNS = {"id": (Product.id,),
+                "price": (Product.price, Product.id),
+                "rating": (Product.rating_rate, Product.id)}
+
+
+async def browse_products(
+    db: AsyncSession,
+    sort: CatalogSort,
+    limit: int,
+    cursor: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_rating: float | None = None,
+) -> tuple[list[Product], str | None]:
+    """Página de produtos e o cursor da próxima (None na última)."""
+    descending = sort.startswith("-")
+    columns = SORT_COLUMNS[sort.lstrip("-")]
+    stmt = select(Product)
+    if min_price is not None:
+        stmt = stmt.where(Product.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    if min_rating is not None:
+        stmt = stmt.where(Product.rating_rate >= min_rating)
+    if Product.rating_rate in columns:
+        stmt = stmt.where(Product.rating_rate.is_not(None))
+    if cursor:
+        key, last = tuple_(*columns), tuple_(*decode_keyset_cursor(cursor, len(columns)))
+        stmt = stmt.where(key < last if descending else key > last)
+    stmt = stmt.order_by(*(column.desc() if descending else column for column in columns))
+    products = list((await db.execute(stmt.limit(limit + 1))).scalars())
+    if len(products) <= limit:
+        return products, None
+    products = products[:limit]
+    return products, encode_keyset_cursor(*(getattr(products[-1], column.key) for column in columns))
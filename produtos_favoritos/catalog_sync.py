@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .config import get_settings
+from .http_client import fakestore_breaker, get_http_client
+from .metrics import track_external_request
+from .models import Product
+from .products_service import (advisory_locks, format_review, not_found_cache,
+                               product_cache, rating_values)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+# Chave do lock consultivo da sincronização (ids de produto começam em 1).
+CATALOG_SYNC_LOCK_KEY = 0
+SYNCED_FIELDS = ("title", "image", "price", "review", "rating_rate", "rating_count")
+
+
+async def fetch_external_catalog() -> list[dict]:
+    with fakestore_breaker.guard(), track_external_request("catalog"):
+        r = await get_http_client().get("/products")
+        r.raise_for_status()
+        if not r.text or r.text.strip() == "":
+            raise HTTPException(
+                status_code=502, detail="Catálogo vazio na API externa")
+        return r.json()
+
+
+def _catalog_row(data: dict) -> dict:
+    return {
+        "id": int(data["id"]),
+        "title": data.get("title"),
+        "image": data.get("image"),
+        "price": float(data.get("price", 0)),
+        "review": format_review(data),
+        **rating_values(data),
+    }
+
+
+async def sync_catalog(db: AsyncSession) -> dict[str, int]:
+    """Busca o catálogo completo e faz upsert em lote numa única transação.
+
+    Só reescreve as linhas que mudaram; as demais recebem apenas o novo `last_sync`.
+    Retorna as contagens de inseridos, atualizados e inalterados.
+    """
+    async with advisory_locks(db) as locks:
+        if not await locks.try_acquire([CATALOG_SYNC_LOCK_KEY]):
+            logger.info("Sincronização do catálogo já em andamento em outra réplica")
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+        result = await _sync_catalog(db)
+        await locks.release([CATALOG_SYNC_LOCK_KEY])
+        return result
+
+
+async def _sync_catalog(db: AsyncSession) -> dict[str, int]:
+    catalog = await fetch_external_catalog()
+    rows = {row["id"]: row for row in map(_catalog_row, catalog)}
+
+    now = datetime.utcnow()
+    stored = {
+        row.id: row for row in await db.execute(
+            select(Product.id, *(getattr(Product, field) for field in SYNCED_FIELDS))
+            .where(Product.id.in_(rows))
+        )
+    }
+    new_rows, changed_rows, unchanged_ids = [], [], []
+    for product_id, row in rows.items():
+        current = stored.get(product_id)
+        if current is None:
+            new_rows.append({**row, "last_sync": now})
+        elif any(getattr(current, field) != row[field] for field in SYNCED_FIELDS):
+            changed_rows.append({**row, "last_sync": now})
+        else:
+            unchanged_ids.append(product_id)
+
+    if new_rows:
+        await db.execute(insert(Product), new_rows)
+    if changed_rows:
+        await db.execute(update(Product), changed_rows)
+    if unchanged_ids:
+        await db.execute(update(Product).where(Product.id.in_(unchanged_ids))
+                         .values(last_sync=now).execution_options(synchronize_session=False))
+    await db.commit()
+
+    for row in changed_rows:
+        await product_cache.invalidate(row["id"])
+    for row in new_rows:
+        not_found_cache.invalidate(row["id"])
+    return {"inserted": len(new_rows), "updated": len(changed_rows), "unchanged": len(unchanged_ids)}
+
+
+async def run_periodic_sync(session_factory: async_sessionmaker, interval_minutes: int) -> None:
+    """Sincroniza o catálogo a cada `interval_minutes` até ser cancelado."""
+    while True:
+        try:
+            async with session_factory() as db:
+                result = await sync_catalog(db)
+            logger.info("Catálogo sincronizado: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Falha ao sincronizar o catálogo")
+        await asyncio.sleep(interval_minutes * 60)
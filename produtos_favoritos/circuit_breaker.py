@@ -0,0 +1,118 @@
+"""Circuit breaker para as chamadas à FakeStore API.
+
+Depois de `failure_threshold` falhas seguidas o circuito abre e as chamadas
+falham na hora (503) por `recovery_seconds`. Passado esse tempo ele fica
+meio-aberto: até `half_open_max_calls` chamadas de teste passam; um sucesso
+fecha o circuito e uma falha o abre de novo.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from fastapi import HTTPException
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=503, detail="API externa indisponível no momento",
+            headers={"Retry-After": str(max(1, round(retry_after)))})
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Só erros de rede, timeouts e 5xx contam como falha; 404 e afins são respostas válidas."""
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, recovery_seconds: float, half_open_max_calls: int = 1, on_state_change=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = 0.0
+            self._probes = 0
+            self._set_state(CLOSED)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        if self.on_state_change:
+            self.on_state_change(state)
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_seconds:
+            self._probes = 0
+            self._set_state(HALF_OPEN)
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+    def before_call(self) -> None:
+        """Reserva a chamada ou levanta `CircuitOpenError` se o circuito não permitir."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                raise CircuitOpenError(
+                    self.recovery_seconds - (time.monotonic() - self._opened_at))
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(self.recovery_seconds)
+                self._probes += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    @contextmanager
+    def guard(self):
+        """Envolve uma chamada à API externa, registrando sucesso ou falha."""
+        self.before_call()
+        try:
+            yield
+        except Exception as exc:
+            if is_upstream_failure(exc):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Cancelada: não conta como resultado, só devolve a vaga de teste.
+            with self._lock:
+                if self._state == HALF_OPEN:
+                    self._probes = max(0, self._probes - 1)
+            raise
+        else:
+            self.record_success()
@@ -1,21 +1,163 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import asyncio
+import logging
+import time
+
+from fastapi import Depends
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from .config import get_settings
 
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "psycopg"}
+
+
+def to_async_url(url: str) -> str:
+    """Converte a URL do banco para o driver assíncrono equivalente (psycopg/aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, future=True)
-SessionLocal = sessionmaker(
-    bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+# Engines criados sob demanda: importar a aplicação não carrega driver nem abre conexão.
+_engine: Engine | None = None
+_session_factory: sessionmaker | None = None
+_async_engine: AsyncEngine | None = None
+_async_session_factory: async_sessionmaker | None = None
+_replica_router: "ReplicaRouter | None" = None
+
+
+def get_engine() -> Engine:
+    """Engine síncrono, usado por scripts."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(settings.database_url, echo=False, future=True)
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """Abre uma sessão síncrona (mesma interface do antigo `sessionmaker`)."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            bind=get_engine(), autoflush=False, autocommit=False, expire_on_commit=False)
+    return _session_factory()
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            to_async_url(settings.database_url), echo=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Abre uma sessão assíncrona no primário (mesma interface do antigo `async_sessionmaker`)."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+class ReplicaRouter:
+    """Distribui as sessões de leitura entre as réplicas em round-robin.
+
+    Cada réplica passa por um `SELECT 1` no máximo a cada `check_interval`
+    segundos, limitado a `check_timeout` segundos; as que falham ou demoram
+    ficam fora do rodízio até o próximo check. Enquanto o primeiro check não
+    termina, a réplica também fica de fora.
+    """
+
+    def __init__(self, urls: list[str], check_interval: float, check_timeout: float = 2.0):
+        self.engines = [create_async_engine(to_async_url(url), echo=False) for url in urls]
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = 0
+        self._healthy = [False] * len(self.engines)
+        self._checked_at: list[float | None] = [None] * len(self.engines)
+
+    async def _is_healthy(self, index: int) -> bool:
+        checked_at = self._checked_at[index]
+        if checked_at is not None and time.monotonic() - checked_at < self.check_interval:
+            return self._healthy[index]
+        self._checked_at[index] = time.monotonic()
+        try:
+            await asyncio.wait_for(self._probe(index), self.check_timeout)
+            healthy = True
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as exc:
+            logger.warning("Réplica %s indisponível: %r",
+                           self.engines[index].url.render_as_string(), exc)
+            healthy = False
+        self._healthy[index] = healthy
+        return healthy
+
+    async def _probe(self, index: int) -> None:
+        async with self.engines[index].connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def pick(self) -> AsyncEngine | None:
+        """Próxima réplica saudável, ou None se não houver nenhuma."""
+        for _ in range(len(self.engines)):
+            index = self._next % len(self.engines)
+            self._next += 1
+            if await self._is_healthy(index):
+                return self.engines[index]
+        return None
+
+    async def dispose(self) -> None:
+        for replica in self.engines:
+            await replica.dispose()
+
+
+def get_replica_router() -> ReplicaRouter:
+    global _replica_router
+    if _replica_router is None:
+        _replica_router = ReplicaRouter(
+            [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+            settings.replica_health_check_seconds,
+            settings.replica_health_check_timeout_seconds)
+    return _replica_router
+
+
+async def dispose_engines() -> None:
+    """Fecha os pools criados até aqui; o próximo uso recria os engines."""
+    global _engine, _session_factory, _async_engine, _async_session_factory, _replica_router
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _replica_router is not None:
+        await _replica_router.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = _session_factory = _async_engine = _async_session_factory = _replica_router = None
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db(primary: AsyncSession = Depends(get_db)):
+    """Sessão somente leitura numa réplica; sem réplica saudável, usa o primário.
+
+    Consultas feitas aqui podem estar atrasadas em relação ao primário.
+    """
+    replica = await get_replica_router().pick()
+    if replica is None:
+        yield primary
+        return
+    async with AsyncSession(bind=replica, autoflush=False, expire_on_commit=False) as db:
         yield db
-    finally:
-        db.close()
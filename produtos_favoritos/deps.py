@@ -1,39 +1,77 @@
-from fastapi import Depends, HTTPException, status
+import time
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import LRUCache
 from .config import get_settings
 from .database import get_db
 from .models import Client
+from .schemas import ClientRead
+from .security import decode_access_token
 
 reuseable_oauth = OAuth2PasswordBearer(
     tokenUrl="/auth/login", scheme_name="JWT")
 settings = get_settings()
+# Clientes já resolvidos, por id. Invalidado ao alterar ou remover o cliente;
+# entre réplicas a defasagem máxima é `principal_cache_ttl_seconds`.
+principal_cache: LRUCache[int, ClientRead] = LRUCache(
+    settings.principal_cache_max_items)
+
+
+def cache_principal(client: Client) -> ClientRead:
+    principal = ClientRead.model_validate(client)
+    principal_cache.set(client.id, principal,
+                        time.time() + settings.principal_cache_ttl_seconds)
+    return principal
+
+
+def invalidate_principal(client_id: int) -> None:
+    principal_cache.invalidate(client_id)
+
+
+def token_claims(request: Request, token: str) -> dict:
+    """Claims do token, reaproveitando a verificação feita pelo rate limiting."""
+    verified = getattr(request.state, "jwt_claims", None)
+    if verified is None or verified[0] != token:
+        return decode_access_token(token)
+    if verified[1] is None:
+        raise JWTError("Token inválido")
+    return verified[1]
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(reuseable_oauth)) -> Client:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(reuseable_oauth)) -> ClientRead:
     credentials_exc = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                     detail="Credenciais inválidas", headers={"WWW-Authenticate": "Bearer"})
     try:
-        payload = jwt.decode(token, settings.jwt_secret,
-                             algorithms=[settings.jwt_algorithm])
+        payload = token_claims(request, token)
         email: str | None = payload.get("sub")
         if email is None:
             raise credentials_exc
     except JWTError:
         raise credentials_exc
-    user = db.query(Client).filter(Client.email == email).first()
-    if not user:
+    client_id: int | None = payload.get("id")
+    if client_id is not None:
+        principal = principal_cache.get(client_id)
+        if principal is not None and principal.email == email:
+            return principal
+        user = await db.get(Client, client_id)
+    else:
+        # Tokens emitidos antes da claim `id`.
+        user = (await db.execute(select(Client).where(Client.email == email))).scalar_one_or_none()
+    if not user or user.email != email:
         raise credentials_exc
-    return user
+    return cache_principal(user)
 
 
-def get_current_active_user(current: Client = Depends(get_current_user)) -> Client:
+async def get_current_active_user(current: ClientRead = Depends(get_current_user)) -> ClientRead:
     return current
 
 
-def get_current_admin(current: Client = Depends(get_current_user)) -> Client:
+async def get_current_admin(current: ClientRead = Depends(get_current_user)) -> ClientRead:
     if current.role != "admin":
         raise HTTPException(
             status_code=403, detail="Acesso restrito a administradores")
@@ -0,0 +1,35 @@
+import hashlib
+from datetime import datetime
+
+from fastapi import Request
+
+from .pagination import PageParams
+from .schemas import ProductRead
+
+
+def _version(moment: datetime | None) -> str:
+    return format(int(moment.timestamp() * 1_000_000), "x") if moment else "0"
+
+
+def product_etag(product: ProductRead) -> str:
+    return f'"p{product.id}-{_version(product.last_sync)}"'
+
+
+def favorites_etag(client_id: int, favorites_updated_at: datetime | None, page: PageParams) -> str:
+    """ETag da página de favoritos, derivada da última alteração nos favoritos do cliente.
+
+    Mudanças nos dados de um produto não alteram esta ETag; para isso vale a de
+    `/products/{id}`.
+    """
+    page_key = hashlib.sha1(
+        f"{page.cursor}:{page.limit}".encode()).hexdigest()[:12]
+    return f'"f{client_id}-{_version(favorites_updated_at)}-{page_key}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indica se o `If-None-Match` da requisição casa com a ETag (resposta 304)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag in candidates
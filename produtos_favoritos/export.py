@@ -0,0 +1,74 @@
+"""Exportação de clientes com seus favoritos em NDJSON (um cliente por linha).
+
+Os clientes são lidos com cursor no servidor em blocos de `export_chunk_size`
+(`yield_per`), e os favoritos de cada bloco vêm de uma única query. A memória
+fica limitada a um bloco, independente do tamanho da tabela.
+"""
+import json
+import zlib
+from collections import defaultdict
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import Client, Favorite, Product
+
+settings = get_settings()
+
+
+async def iter_export_records(db: AsyncSession, chunk_size: int | None = None) -> AsyncIterator[dict]:
+    chunk_size = chunk_size or settings.export_chunk_size
+    result = await db.stream(
+        select(Client.id, Client.name, Client.email, Client.role, Client.created_at)
+        .order_by(Client.id)
+        .execution_options(yield_per=chunk_size))
+    async for clients in result.partitions():
+        favorites = defaultdict(list)
+        rows = await db.execute(
+            select(Favorite.client_id, Favorite.product_id, Favorite.created_at,
+                   Product.title, Product.price)
+            .join(Product, Product.id == Favorite.product_id)
+            .where(Favorite.client_id.in_([client.id for client in clients]))
+            .order_by(Favorite.client_id, Favorite.created_at, Favorite.id))
+        for row in rows:
+            favorites[row.client_id].append({
+                "product_id": row.product_id,
+                "title": row.title,
+                "price": row.price,
+                "created_at": row.created_at.isoformat(),
+            })
+        for client in clients:
+            yield {
+                "id": client.id,
+                "name": client.name,
+                "email": client.email,
+                "role": client.role,
+                "created_at": client.created_at.isoformat(),
+                "favorites": favorites.get(client.id, []),
+            }
+
+
+async def iter_export_ndjson(db: AsyncSession, gzip: bool = False, chunk_size: int | None = None) -> AsyncIterator[bytes]:
+    """Gera o NDJSON em pedaços de bytes, um por bloco de clientes, opcionalmente em gzip."""
+    chunk_size = chunk_size or settings.export_chunk_size
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    lines: list[str] = []
+
+    def flush() -> bytes:
+        data = "".join(lines).encode()
+        lines.clear()
+        if compressor:
+            # Z_SYNC_FLUSH entrega o bloco já comprimido sem fechar o stream.
+            return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    async for record in iter_export_records(db, chunk_size):
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if len(lines) >= chunk_size:
+            yield flush()
+    if lines:
+        yield flush()
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,54 @@
+import httpx
+
+from .circuit_breaker import CircuitBreaker
+from .config import get_settings
+from .metrics import CIRCUIT_BREAKER_STATE, CIRCUIT_STATE_VALUES
+
+settings = get_settings()
+_client: httpx.AsyncClient | None = None
+# Compartilhado por todas as chamadas à FakeStore deste processo.
+fakestore_breaker = CircuitBreaker(
+    failure_threshold=settings.circuit_breaker_failure_threshold,
+    recovery_seconds=settings.circuit_breaker_recovery_seconds,
+    half_open_max_calls=settings.circuit_breaker_half_open_max_calls,
+    on_state_change=lambda state: CIRCUIT_BREAKER_STATE.set(
+        CIRCUIT_STATE_VALUES[state]),
+)
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.fakestore_base_url,
+        http2=settings.http2_enabled,
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            settings.http_read_timeout,
+            connect=settings.http_connect_timeout,
+        ),
+    )
+
+
+async def start_http_client() -> None:
+    """Cria o client compartilhado (chamado no lifespan da aplicação)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Retorna o client compartilhado, criando-o sob demanda fora do lifespan (scripts)."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
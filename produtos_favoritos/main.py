@@ -1,14 +1,51 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
 
-from .database import Base, engine
+from fastapi import FastAPI, Response
+
+from .catalog_sync import run_periodic_sync
+from .config import get_settings
+from .database import AsyncSessionLocal, dispose_engines, get_async_engine
+from .http_client import close_http_client, start_http_client
+from .metrics import MetricsMiddleware, instrument_engine, render_metrics
+from .products_service import cancel_background_refreshes, product_cache
+from .rate_limit import RateLimitMiddleware, rate_limit_backend
 from .routers_auth import router as auth_router
 from .routers_clients import router as clients_router
 from .routers_favorites import router as favorites_router
 from .routers_products import router as products_router
+from .security import password_hasher
+
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # O schema é gerenciado pelas migrações (alembic upgrade head); o engine
+    # não abre conexão aqui, só na primeira requisição.
+    instrument_engine(get_async_engine().sync_engine)
+    await start_http_client()
+    await product_cache.start()
+    sync_task = None
+    if settings.catalog_sync_interval_minutes > 0:
+        sync_task = asyncio.create_task(run_periodic_sync(
+            AsyncSessionLocal, settings.catalog_sync_interval_minutes))
+    try:
+        yield
+    finally:
+        if sync_task is not None:
+            sync_task.cancel()
+            await asyncio.gather(sync_task, return_exceptions=True)
+        await cancel_background_refreshes()
+        await product_cache.close()
+        await rate_limit_backend.close()
+        await close_http_client()
+        await dispose_engines()
+        password_hasher.shutdown()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Produtos Favoritos API",
     version="0.1.0",
     description="""
@@ -39,6 +76,9 @@ app = FastAPI(
     }
 )
 
+# Adicionado antes, fica por dentro: as métricas também contam os 429.
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(auth_router)
 app.include_router(clients_router)
 app.include_router(favorites_router)
@@ -49,3 +89,10 @@ app.include_router(products_router)
 def health():
     """Verifica se a API está funcionando."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas no formato de exposição do Prometheus."""
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
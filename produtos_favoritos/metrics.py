@@ -0,0 +1,131 @@
+"""Métricas Prometheus da API.
+
+Com a variável `PROMETHEUS_MULTIPROC_DIR` definida (obrigatória com mais de um
+worker do uvicorn), cada processo grava suas métricas nesse diretório e o
+`/metrics` de qualquer worker agrega todos eles.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Requisições HTTP por rota", ["method", "route", "status"])
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP", ["method", "route"])
+EXTERNAL_LATENCY = Histogram(
+    "fakestore_request_duration_seconds", "Latência das chamadas à FakeStore API", ["endpoint"])
+EXTERNAL_ERRORS = Counter(
+    "fakestore_request_errors_total", "Erros nas chamadas à FakeStore API", ["endpoint", "reason"])
+PRODUCT_CACHE_EVENTS = Counter(
+    "product_cache_events_total", "Acertos, faltas e atualizações do cache de produtos", ["event"])
+PRODUCT_CACHE_ITEMS = Gauge(
+    "product_cache_items", "Produtos no cache em memória (near-cache, com Redis)",
+    multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Conexões em uso no pool do banco",
+    multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Conexões além do tamanho do pool do banco",
+    multiprocess_mode="livesum")
+CIRCUIT_BREAKER_STATE = Gauge(
+    "fakestore_circuit_breaker_state",
+    "Estado do circuit breaker da FakeStore (0 fechado, 1 meio-aberto, 2 aberto)",
+    multiprocess_mode="max")
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "Tempo de CPU do bcrypt por operação")
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Espera na fila do pool de bcrypt antes de rodar")
+PASSWORD_HASH_QUEUED = Gauge(
+    "password_hash_queued_jobs", "Operações de bcrypt aguardando na fila",
+    multiprocess_mode="livesum")
+PASSWORD_HASH_RUNNING = Gauge(
+    "password_hash_running_jobs", "Operações de bcrypt em execução",
+    multiprocess_mode="livesum")
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Operações de bcrypt recusadas com a fila cheia")
+
+PRODUCT_CACHE_HIT = PRODUCT_CACHE_EVENTS.labels("hit")
+PRODUCT_CACHE_MISS = PRODUCT_CACHE_EVENTS.labels("miss")
+PRODUCT_CACHE_REFRESH = PRODUCT_CACHE_EVENTS.labels("refresh")
+PRODUCT_CACHE_NOT_FOUND = PRODUCT_CACHE_EVENTS.labels("not_found")
+PRODUCT_CACHE_STALE = PRODUCT_CACHE_EVENTS.labels("stale")
+PRODUCT_CACHE_EVICTION = PRODUCT_CACHE_EVENTS.labels("eviction")
+CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que conta requisições e mede latência por rota (template do path)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            HTTP_LATENCY.labels(method, path).observe(
+                time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+
+
+@contextmanager
+def track_external_request(endpoint: str):
+    """Mede a latência de uma chamada à FakeStore e conta os erros por motivo."""
+    start = time.perf_counter()
+    try:
+        yield
+    except HTTPException as exc:
+        EXTERNAL_ERRORS.labels(endpoint, f"http_{exc.status_code}").inc()
+        raise
+    except Exception as exc:
+        response = getattr(exc, "response", None)
+        reason = f"http_{response.status_code}" if response is not None else type(
+            exc).__name__
+        EXTERNAL_ERRORS.labels(endpoint, reason).inc()
+        raise
+    finally:
+        EXTERNAL_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Atualiza os gauges do pool a cada checkout/checkin de conexão."""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return
+
+    def update(*_):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", update)
+    event.listen(pool, "checkin", update)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from sqlalchemy import (Column, DateTime, Float, ForeignKey, Integer, String,
-                        UniqueConstraint)
+from sqlalchemy import (DDL, Column, DateTime, Float, ForeignKey, Index,
+                        Integer, String, UniqueConstraint, event, func,
+                        literal_column)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -16,9 +17,13 @@ class Client(Base):
     role: Mapped[str] = mapped_column(String(20), default="user")
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow)
+    favorites_updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True)
     favorites = relationship(
         "Favorite", back_populates="client", cascade="all, delete-orphan")
 
+    __table_args__ = (Index("ix_clients_created_at_id", "created_at", "id"),)
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -27,11 +32,51 @@ class Product(Base):
     image: Mapped[str] = mapped_column(String(500))
     price: Mapped[float] = mapped_column(Float)
     review: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+    # Mesma avaliação de `review`, em colunas numéricas para ordenar e filtrar.
+    rating_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    rating_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     last_sync: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow)
+    # Contador mantido junto com os favoritos (ver popularity.py).
+    favorites_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0")
     favorites = relationship(
         "Favorite", back_populates="product", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_products_favorites_count_id", "favorites_count", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_rating_rate_id", "rating_rate", "id"),
+        # Busca textual no PostgreSQL (ver search.py); a expressão precisa ser
+        # idêntica à usada na consulta para o índice ser aproveitado.
+        Index("ix_products_title_fts",
+              func.to_tsvector(literal_column("'english'"), literal_column("title")),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+
+# No SQLite a busca usa uma tabela FTS5 de conteúdo externo, mantida por triggers.
+PRODUCTS_FTS_TABLE = "products_fts"
+SQLITE_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE {PRODUCTS_FTS_TABLE} USING fts5(title, content='products', "
+    "content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN "
+    f"INSERT INTO {PRODUCTS_FTS_TABLE}(rowid, title) VALUES (new.id, new.title); END",
+    f"CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN "
+    f"INSERT INTO {PRODUCTS_FTS_TABLE}({PRODUCTS_FTS_TABLE}, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    f"CREATE TRIGGER products_fts_au AFTER UPDATE OF title ON products BEGIN "
+    f"INSERT INTO {PRODUCTS_FTS_TABLE}({PRODUCTS_FTS_TABLE}, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    f"INSERT INTO {PRODUCTS_FTS_TABLE}(rowid, title) VALUES (new.id, new.title); END",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Product.__table__, "after_create",
+                 DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "after_drop",
+             DDL(f"DROP TABLE IF EXISTS {PRODUCTS_FTS_TABLE}").execute_if(dialect="sqlite"))
+
 
 class Favorite(Base):
     __tablename__ = "favorites"
@@ -46,5 +91,8 @@ class Favorite(Base):
     client = relationship("Client", back_populates="favorites")
     product = relationship("Product", back_populates="favorites")
 
-    __table_args__ = (UniqueConstraint(
-        'client_id', 'product_id', name='uq_client_product'),)
+    __table_args__ = (
+        UniqueConstraint('client_id', 'product_id', name='uq_client_product'),
+        Index("ix_favorites_client_created_at_id",
+              "client_id", "created_at", "id"),
+    )
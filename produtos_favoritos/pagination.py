@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import Select, tuple_
+
+from .config import get_settings
+
+settings = get_settings()
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Parâmetros de paginação por cursor (keyset) sobre (`created_at`, `id`)."""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(
+            default=None, description="Cursor retornado no header X-Next-Cursor"),
+        limit: int = Query(default=settings.page_size_default,
+                           ge=1, le=settings.page_size_max),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def encode_keyset_cursor(*values: int | float) -> str:
+    """Cursor genérico com os valores numéricos da chave de ordenação do último item."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str, size: int) -> list[int | float]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if (not isinstance(values, list) or len(values) != size
+            or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values)):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def paginate(stmt: Select, created_at_col, id_col, page: PageParams) -> Select:
+    """Ordena por (created_at, id) e aplica o cursor; busca um item extra para saber se há próxima página."""
+    if page.cursor:
+        stmt = stmt.where(tuple_(created_at_col, id_col)
+                          > tuple_(*decode_cursor(page.cursor)))
+    return stmt.order_by(created_at_col, id_col).limit(page.limit + 1)
+
+
+def finish_page(rows: list, page: PageParams, response: Response) -> list:
+    """Corta o item extra e, se houver próxima página, publica o cursor no header."""
+    if len(rows) <= page.limit:
+        return rows
+    rows = rows[:page.limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
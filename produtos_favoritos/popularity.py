@@ -0,0 +1,36 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Favorite, Product
+
+
+async def add_to_favorites_count(db: AsyncSession, product_ids: list[int], delta: int) -> None:
+    """Ajusta o contador de favoritos dos produtos, na transação corrente."""
+    if not product_ids:
+        return
+    await db.execute(update(Product).where(Product.id.in_(product_ids))
+                     .values(favorites_count=Product.favorites_count + delta)
+                     .execution_options(synchronize_session=False))
+
+
+async def discount_client_favorites(db: AsyncSession, client_id: int) -> None:
+    """Desconta os favoritos do cliente antes de removê-lo."""
+    await db.execute(update(Product)
+                     .where(Product.id.in_(select(Favorite.product_id).where(Favorite.client_id == client_id)))
+                     .values(favorites_count=Product.favorites_count - 1)
+                     .execution_options(synchronize_session=False))
+
+
+async def popular_products(db: AsyncSession, limit: int) -> list[Product]:
+    stmt = select(Product).order_by(Product.favorites_count.desc(),
+                                    Product.id.desc()).limit(limit)
+    return list((await db.execute(stmt)).scalars())
+
+
+async def recompute_favorites_count(db: AsyncSession) -> None:
+    """Recalcula todos os contadores a partir da tabela `favorites`."""
+    count = select(func.count(Favorite.id)).where(
+        Favorite.product_id == Product.id).scalar_subquery()
+    await db.execute(update(Product).values(favorites_count=count)
+                     .execution_options(synchronize_session=False))
+    await db.commit()
@@ -1,19 +1,69 @@
-from datetime import datetime, timedelta
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 
-import httpx
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import CacheBackend, LRUCache, MemoryCacheBackend, RedisCacheBackend
+from .circuit_breaker import is_upstream_failure
 from .config import get_settings
+from .http_client import fakestore_breaker, get_http_client
+from .metrics import (PRODUCT_CACHE_EVICTION, PRODUCT_CACHE_HIT,
+                      PRODUCT_CACHE_ITEMS, PRODUCT_CACHE_MISS,
+                      PRODUCT_CACHE_NOT_FOUND, PRODUCT_CACHE_REFRESH,
+                      PRODUCT_CACHE_STALE, track_external_request)
 from .models import Product
+from .schemas import ProductRead
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
-BASE_URL = "https://fakestoreapi.com/products"
+# Primeira chave dos locks consultivos (pg_try_advisory_lock(int, int)).
+REFRESH_LOCK_NAMESPACE = 0x5046
+_inflight: dict[int, asyncio.Future] = {}
+_background_tasks: set[asyncio.Task] = set()
+
+
+class RefreshAbandoned(Exception):
+    """O líder de uma atualização coalescida foi cancelado antes de concluí-la."""
+
+
+def encode_product(product: ProductRead) -> bytes:
+    # `last_sync` é excluído do dump da API, mas precisa ir para o cache (TTL e ETag).
+    data = product.model_dump(mode="json")
+    data["last_sync"] = product.last_sync.isoformat() if product.last_sync else None
+    return json.dumps(data).encode()
+
+
+def decode_product(raw: bytes) -> ProductRead:
+    return ProductRead.model_validate_json(raw)
+
+
+def create_product_cache() -> CacheBackend[int, ProductRead]:
+    if settings.cache_backend == "redis":
+        return RedisCacheBackend(
+            settings.redis_url, "pf:product", encode_product, decode_product, int,
+            local_maxsize=settings.product_cache_max_items,
+            local_ttl=settings.cache_local_ttl_seconds,
+            on_evict=PRODUCT_CACHE_EVICTION.inc, on_resize=PRODUCT_CACHE_ITEMS.set)
+    return MemoryCacheBackend(settings.product_cache_max_items,
+                              PRODUCT_CACHE_EVICTION.inc, PRODUCT_CACHE_ITEMS.set)
+
+
+product_cache = create_product_cache()
+# Ids confirmados como inexistentes na API externa (cache negativo).
+not_found_cache: LRUCache[int, bool] = LRUCache(
+    settings.product_not_found_cache_max_items)
 
 
 async def fetch_external_product(product_id: int) -> dict:
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(f"{BASE_URL}/{product_id}")
+    with fakestore_breaker.guard(), track_external_request("product"):
+        r = await get_http_client().get(f"/products/{product_id}")
         if r.status_code == 404:
             raise HTTPException(
                 status_code=404, detail="Produto não encontrado na API externa")
@@ -26,27 +76,51 @@ async def fetch_external_product(product_id: int) -> dict:
         return r.json()
 
 
+def remember_not_found(product_id: int) -> None:
+    not_found_cache.set(product_id, True,
+                        time.time() + settings.product_not_found_ttl_seconds)
+
+
+def known_not_found(product_id: int) -> bool:
+    if not_found_cache.get(product_id):
+        PRODUCT_CACHE_NOT_FOUND.inc()
+        return True
+    return False
+
+
 def ttl_expired(product: Product) -> bool:
     return datetime.utcnow() - product.last_sync > timedelta(hours=settings.product_cache_ttl_hours)
 
 
-async def get_or_refresh_product(db: Session, product_id: int) -> Product:
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if product and not ttl_expired(product):
-        return product
-    data = await fetch_external_product(product_id)
+def format_review(data: dict) -> str | None:
+    rating = data.get("rating")
+    if not rating:
+        return None
+    rate = rating.get("rate", 0)
+    count = rating.get("count", 0)
+    return f"Rating: {rate}/5 ({count} reviews)"
+
+
+def rating_values(data: dict) -> dict:
+    """Colunas numéricas da avaliação (`rating_rate`, `rating_count`), para ordenar e filtrar em SQL."""
     rating = data.get("rating")
-    review_text = None
-    if rating:
-        rate = rating.get("rate", 0)
-        count = rating.get("count", 0)
-        review_text = f"Rating: {rate}/5 ({count} reviews)"
+    if not rating:
+        return {"rating_rate": None, "rating_count": None}
+    return {"rating_rate": float(rating.get("rate", 0)), "rating_count": int(rating.get("count", 0))}
+
+
+def apply_external_data(db: AsyncSession, product: Product | None, product_id: int, data: dict) -> Product:
+    """Copia os dados da API externa para o Product (criando-o se preciso), sem commit."""
+    review_text = format_review(data)
+    rating = rating_values(data)
 
     if product:
         product.title = data.get("title", product.title)
         product.image = data.get("image", product.image)
         product.price = float(data.get("price", product.price))
         product.review = review_text
+        product.rating_rate = rating["rating_rate"]
+        product.rating_count = rating["rating_count"]
         product.last_sync = datetime.utcnow()
     else:
         product = Product(
@@ -55,9 +129,364 @@ async def get_or_refresh_product(db: Session, product_id: int) -> Product:
             image=data.get("image"),
             price=float(data.get("price", 0)),
             review=review_text,
+            **rating,
             last_sync=datetime.utcnow()
         )
         db.add(product)
-    db.commit()
-    db.refresh(product)
     return product
+
+
+class AdvisoryLocks:
+    """Locks consultivos de sessão do PostgreSQL, tomados pela própria sessão.
+
+    Cada comando roda numa transação curta (commit logo em seguida): nenhuma
+    transação fica aberta enquanto a chamada à API externa roda. Os locks
+    valem para ids ainda não armazenados.
+    """
+
+    def __init__(self, db: AsyncSession | None):
+        self.db = db
+
+    async def execute(self, statement: str, params: dict) -> list:
+        rows = list((await self.db.execute(text(statement), params)).scalars())
+        await self.db.commit()
+        return rows
+
+    async def try_acquire(self, keys: list[int]) -> list[int]:
+        """Chaves obtidas, na ordem recebida; as demais estão com outra réplica."""
+        if self.db is None or not keys:
+            return list(keys)
+        granted = set(await self.execute(
+            "SELECT lock_key FROM unnest(CAST(:keys AS integer[])) AS lock_key "
+            "WHERE pg_try_advisory_lock(:namespace, lock_key)",
+            {"keys": keys, "namespace": REFRESH_LOCK_NAMESPACE}))
+        return [key for key in keys if key in granted]
+
+    async def release(self, keys: list[int]) -> None:
+        if self.db is None or not keys:
+            return
+        await self.execute(
+            "SELECT pg_advisory_unlock(:namespace, lock_key) "
+            "FROM unnest(CAST(:keys AS integer[])) AS lock_key",
+            {"keys": keys, "namespace": REFRESH_LOCK_NAMESPACE})
+
+    async def wait(self, keys: list[int]) -> None:
+        """Espera as outras réplicas liberarem as chaves (sem mantê-las)."""
+        if self.db is None:
+            return
+        for key in keys:
+            params = {"key": key, "namespace": REFRESH_LOCK_NAMESPACE}
+            await self.execute("SELECT pg_advisory_lock(:namespace, :key)", params)
+            await self.execute("SELECT pg_advisory_unlock(:namespace, :key)", params)
+
+
+def supports_advisory_locks(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+@asynccontextmanager
+async def advisory_locks(db: AsyncSession):
+    """Coordena atualizações entre réplicas no PostgreSQL; em outros bancos todo lock é concedido.
+
+    Encerra a transação de leitura da sessão (`expire_on_commit=False` mantém os
+    objetos carregados) e a prende a uma única conexão até o fim do bloco, para
+    que os locks, as escritas e o unlock usem a mesma conexão do pool.
+    """
+    if not supports_advisory_locks(db):
+        yield AdvisoryLocks(None)
+        return
+    await db.commit()
+    engine = db.bind
+    async with engine.connect() as conn:
+        db.bind, db.sync_session.bind = conn, conn.sync_connection
+        try:
+            yield AdvisoryLocks(db)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            # Locks de sessão sobrevivem à devolução ao pool: descarta a conexão.
+            await conn.invalidate()
+            raise
+        finally:
+            db.bind, db.sync_session.bind = engine, engine.sync_engine
+
+
+def can_serve_stale(product: Product) -> bool:
+    """Em modo stale-while-revalidate, produtos expirados há menos de
+    `product_max_stale_hours` podem ser servidos enquanto são atualizados."""
+    if not settings.product_stale_while_revalidate:
+        return False
+    max_age = timedelta(
+        hours=settings.product_cache_ttl_hours + settings.product_max_stale_hours)
+    return datetime.utcnow() - product.last_sync <= max_age
+
+
+def schedule_refresh(db: AsyncSession, product_ids: list[int]) -> None:
+    """Atualiza os produtos em background, numa sessão própria no mesmo engine."""
+    product_ids = [
+        product_id for product_id in product_ids if product_id not in _inflight]
+    if not product_ids:
+        return
+    bind = db.bind
+
+    async def run() -> None:
+        async with AsyncSession(bind=bind, autoflush=False, expire_on_commit=False) as session:
+            known = {product.id: product for product in (await session.execute(
+                select(Product).where(Product.id.in_(product_ids)))).scalars()}
+            await refresh_products(session, product_ids, known)
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def cancel_background_refreshes() -> None:
+    tasks = list(_background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def cache_product(product: Product) -> ProductRead:
+    """Grava o snapshot do produto no cache, expirando junto com o TTL do `last_sync`."""
+    snapshot = ProductRead.model_validate(product)
+    expires_at = product.last_sync + \
+        timedelta(hours=settings.product_cache_ttl_hours)
+    await product_cache.set(product.id, snapshot,
+                            expires_at.replace(tzinfo=timezone.utc).timestamp())
+    return snapshot
+
+
+async def get_or_refresh_product(db: AsyncSession, product_id: int) -> ProductRead:
+    cached = (await product_cache.get_many([product_id])).get(product_id)
+    if cached is not None:
+        PRODUCT_CACHE_HIT.inc()
+        return cached
+    PRODUCT_CACHE_MISS.inc()
+    if known_not_found(product_id):
+        raise HTTPException(status_code=404, detail="Produto não encontrado")
+    product = await db.get(Product, product_id)
+    if product and not ttl_expired(product):
+        return await cache_product(product)
+    if product and can_serve_stale(product):
+        schedule_refresh(db, [product_id])
+        return ProductRead.model_validate(product)
+    known = {product_id: product} if product else {}
+    products, errors = await refresh_products(db, [product_id], known)
+    error = errors.get(product_id)
+    if error is not None and product is None and is_upstream_failure(error) \
+            and not isinstance(error, HTTPException):
+        raise HTTPException(
+            status_code=503, detail="API externa indisponível no momento") from error
+    if error is not None and (product is None or not is_upstream_failure(error)):
+        raise error
+    if error is not None:
+        # API externa fora do ar ou circuito aberto: serve a cópia local expirada.
+        PRODUCT_CACHE_STALE.inc()
+    return ProductRead.model_validate(products[product_id])
+
+
+async def get_or_refresh_products(db: AsyncSession, product_ids: list[int]) -> dict[int, ProductRead]:
+    """Versão em lote de `get_or_refresh_product`. Ids que não puderam ser
+    obtidos ficam fora do resultado."""
+    products, _ = await get_or_refresh_products_with_errors(db, product_ids)
+    return products
+
+
+async def get_or_refresh_products_with_errors(
+    db: AsyncSession, product_ids: list[int]
+) -> tuple[dict[int, ProductRead], dict[int, BaseException]]:
+    """Como `get_or_refresh_products`, mas também devolve o erro de cada id que ficou de fora.
+
+    Lê o cache numa só chamada (um pipeline no Redis), busca os que faltam em uma
+    única query e atualiza os ausentes ou expirados em paralelo. Um
+    `HTTPException` 404 indica produto inexistente; os demais erros são falhas
+    da API externa (indisponível, timeout, circuito aberto).
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    result = await product_cache.get_many(product_ids)
+    errors: dict[int, BaseException] = {}
+    missing = []
+    for product_id in product_ids:
+        if product_id in result:
+            PRODUCT_CACHE_HIT.inc()
+        else:
+            PRODUCT_CACHE_MISS.inc()
+            missing.append(product_id)
+    if not missing:
+        return result, errors
+
+    stored = {product.id: product for product in (await db.execute(
+        select(Product).where(Product.id.in_(missing)))).scalars()}
+    stale = []
+    revalidate = []
+    for product_id in missing:
+        product = stored.get(product_id)
+        if product is not None and not ttl_expired(product):
+            result[product_id] = await cache_product(product)
+        elif product is not None and can_serve_stale(product):
+            result[product_id] = ProductRead.model_validate(product)
+            revalidate.append(product_id)
+        else:
+            stale.append(product_id)
+    if revalidate:
+        schedule_refresh(db, revalidate)
+    if stale:
+        products, refresh_errors = await refresh_products(db, stale, {
+            product_id: stored[product_id] for product_id in stale if product_id in stored})
+        for product_id, product in products.items():
+            if product_id in refresh_errors:
+                PRODUCT_CACHE_STALE.inc()
+            result[product_id] = ProductRead.model_validate(product)
+        errors = {product_id: error for product_id, error in refresh_errors.items()
+                  if product_id not in result}
+    return result, errors
+
+
+async def refresh_products(
+    db: AsyncSession, product_ids: list[int], known: dict[int, Product] | None = None
+) -> tuple[dict[int, Product], dict[int, BaseException]]:
+    """Atualiza os produtos em paralelo (limitado por `product_refresh_concurrency`)
+    e grava tudo em um único commit.
+
+    Atualizações do mesmo produto já em andamento neste processo são reaproveitadas
+    (single-flight): quem chega depois espera o commit do líder e relê a linha. Se
+    outra réplica já está atualizando o produto, o dado armazenado é mantido; um
+    produto ainda não armazenado espera o commit dela e é relido.
+
+    Retorna os produtos disponíveis e os erros por id; produtos cuja atualização
+    falhar mantêm os dados já armazenados.
+    """
+    products = dict(known or {})
+    loop = asyncio.get_running_loop()
+    leading: list[int] = []
+    following: dict[int, asyncio.Future] = {}
+    for product_id in product_ids:
+        inflight = _inflight.get(product_id)
+        if inflight is not None:
+            following[product_id] = inflight
+            continue
+        future = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        _inflight[product_id] = future
+        leading.append(product_id)
+
+    errors: dict[int, BaseException] = {}
+    try:
+        if leading:
+            await _refresh_leading(db, leading, products, errors)
+    except BaseException as exc:
+        # Cancelamento do líder não se propaga: os seguidores recebem RefreshAbandoned e tentam de novo.
+        shared = exc if isinstance(exc, Exception) else RefreshAbandoned(
+            "Atualização do produto interrompida")
+        for product_id in leading:
+            future = _inflight.pop(product_id)
+            if not future.done():
+                future.set_exception(shared)
+        raise
+    for product_id in leading:
+        future = _inflight.pop(product_id)
+        if product_id in errors:
+            future.set_exception(errors[product_id])
+        else:
+            future.set_result(None)
+
+    retry: list[int] = []
+    for product_id, future in following.items():
+        try:
+            await asyncio.shield(future)
+        except RefreshAbandoned:
+            retry.append(product_id)
+            continue
+        except Exception as exc:
+            errors[product_id] = exc
+            continue
+        product = await db.get(Product, product_id, populate_existing=True)
+        if product is not None:
+            products[product_id] = product
+    if retry:
+        retried, retry_errors = await refresh_products(
+            db, retry, {product_id: products[product_id] for product_id in retry if product_id in products})
+        products.update(retried)
+        errors.update(retry_errors)
+    return products, errors
+
+
+async def _refresh_leading(
+    db: AsyncSession, product_ids: list[int], products: dict[int, Product], errors: dict[int, BaseException]
+) -> None:
+    async with advisory_locks(db) as locks:
+        # Em caso de erro a conexão é descartada, o que já libera os locks.
+        granted = await locks.try_acquire(product_ids)
+        if granted:
+            await _fetch_and_store(db, granted, products, errors)
+        await locks.release(granted)
+        # Locks liberados antes de esperar pelos das outras réplicas (sem deadlock).
+        waiting = [product_id for product_id in product_ids
+                   if product_id not in granted and product_id not in products]
+        if not waiting:
+            return
+        await locks.wait(waiting)
+        missing = []
+        for product_id in waiting:
+            product = await db.get(Product, product_id, populate_existing=True)
+            if product is None:
+                missing.append(product_id)
+            else:
+                products[product_id] = product
+    if missing:
+        # A outra réplica não conseguiu gravar: busca aqui mesmo.
+        await _fetch_and_store(db, missing, products, errors)
+
+
+async def _fetch_and_store(
+    db: AsyncSession, product_ids: list[int], products: dict[int, Product], errors: dict[int, BaseException]
+) -> None:
+    semaphore = asyncio.Semaphore(settings.product_refresh_concurrency)
+
+    async def fetch(product_id: int) -> dict:
+        if known_not_found(product_id):
+            raise HTTPException(
+                status_code=404, detail="Produto não encontrado na API externa")
+        async with semaphore:
+            try:
+                return await fetch_external_product(product_id)
+            except HTTPException as exc:
+                if exc.status_code == 404:
+                    remember_not_found(product_id)
+                raise
+
+    results = await asyncio.gather(
+        *(fetch(product_id) for product_id in product_ids), return_exceptions=True)
+    for product_id, data in zip(product_ids, results):
+        if isinstance(data, BaseException):
+            logger.warning("Falha ao atualizar produto %s: %r",
+                           product_id, data)
+            errors[product_id] = data
+            continue
+        PRODUCT_CACHE_REFRESH.inc()
+        products[product_id] = apply_external_data(
+            db, products.get(product_id), product_id, data)
+    try:
+        await db.commit()
+        for product_id in product_ids:
+            if product_id not in errors:
+                await cache_product(products[product_id])
+    except IntegrityError:
+        # Outra réplica inseriu o mesmo produto antes: usa a linha dela.
+        await db.rollback()
+        for product_id in product_ids:
+            product = await db.get(Product, product_id, populate_existing=True)
+            if product is not None:
+                products[product_id] = product
+                errors.pop(product_id, None)
+            else:
+                products.pop(product_id, None)
+                errors.setdefault(product_id, HTTPException(
+                    status_code=404, detail="Produto não encontrado"))
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    # Evita o aviso "exception was never retrieved" quando não há seguidores.
+    if not future.cancelled():
+        future.exception()
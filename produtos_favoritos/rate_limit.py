@@ -0,0 +1,188 @@
+"""Rate limiting por token bucket, como middleware ASGI.
+
+Cada requisição consome um token do balde da sua chave; o balde é reposto a
+`rate` tokens por segundo até `burst`. Sem token disponível a resposta é 429 com
+`Retry-After`. A chave combina o grupo de rotas com o cliente (claim `id` do JWT)
+ou, sem token válido, o IP. O login é sempre limitado por IP. As claims
+verificadas ficam em `scope["state"]["jwt_claims"]` (junto com o token) para
+`get_current_user` não verificar o JWT de novo.
+
+O backend `memory` vale por processo; `redis` compartilha os baldes entre
+réplicas (um script Lua atômico por requisição). Se o Redis falhar, a
+requisição passa (fail open).
+"""
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from jose import JWTError
+
+from .config import get_settings
+from .security import decode_access_token
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class RateLimitRule(NamedTuple):
+    group: str
+    prefixes: tuple[str, ...]
+    rate: float
+    burst: int
+    by_ip: bool = False
+
+
+def build_rules() -> list[RateLimitRule]:
+    """Regras na ordem de precedência; a última vale para as demais rotas."""
+    return [
+        RateLimitRule("login", ("/auth/login", "/auth/register"),
+                      settings.rate_limit_login_per_minute / 60, settings.rate_limit_login_burst, by_ip=True),
+        RateLimitRule("products", ("/products",),
+                      settings.rate_limit_products_per_second, settings.rate_limit_products_burst),
+        RateLimitRule("default", ("/",),
+                      settings.rate_limit_default_per_second, settings.rate_limit_default_burst),
+    ]
+
+
+class MemoryRateLimitBackend:
+    """Baldes em memória, limitados a `max_keys` (os menos usados são descartados)."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, rate: float, burst: int) -> float:
+        """Consome um token; retorna 0 se permitido, senão os segundos até o próximo token."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local retry_ms = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return retry_ms
+"""
+
+
+class RedisRateLimitBackend:
+    """Baldes compartilhados no Redis; o relógio é o do servidor Redis."""
+
+    def __init__(self, url: str, prefix: str = "pf:ratelimit"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError(
+                'RATE_LIMIT_BACKEND=redis requer o pacote redis: pip install "redis>=5"') from exc
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.script = self.redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def hit(self, key: str, rate: float, burst: int) -> float:
+        try:
+            retry_ms = await self.script(keys=[f"{self.prefix}:{key}"], args=[rate, burst])
+        except Exception as exc:
+            logger.warning("Rate limit indisponível, liberando requisição: %r", exc)
+            return 0.0
+        return int(retry_ms) / 1000
+
+    def clear(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_rate_limit_backend():
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimitBackend(settings.redis_url)
+    return MemoryRateLimitBackend(settings.rate_limit_max_keys)
+
+
+rate_limit_backend = create_rate_limit_backend()
+
+
+def _client_key(scope) -> str | None:
+    """Id do cliente a partir do Bearer token, se válido."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                payload = decode_access_token(token)
+            except JWTError:
+                payload = None
+            scope.setdefault("state", {})["jwt_claims"] = (token, payload)
+            if payload is None:
+                return None
+            client_id = payload.get("id") or payload.get("sub")
+            return f"client:{client_id}" if client_id is not None else None
+    return None
+
+
+class RateLimitMiddleware:
+    EXEMPT_PATHS = ("/health", "/metrics")
+
+    def __init__(self, app, rules: list[RateLimitRule] | None = None):
+        self.app = app
+        self.rules = rules or build_rules()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        rule = next(rule for rule in self.rules if path.startswith(rule.prefixes))
+        identity = None if rule.by_ip else _client_key(scope)
+        if identity is None:
+            client = scope.get("client")
+            identity = f"ip:{client[0] if client else 'unknown'}"
+        retry_after = await rate_limit_backend.hit(f"{rule.group}:{identity}", rule.rate, rule.burst)
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+        body = json.dumps(
+            {"detail": "Muitas requisições, tente novamente em instantes"}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
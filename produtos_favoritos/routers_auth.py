@@ -1,39 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .database import get_db
 from .deps import get_current_active_user
 from .models import Client
 from .schemas import ClientCreate, ClientRead, Token
-from .security import create_access_token, hash_password, verify_password
+from .security import (create_access_token, hash_password_async,
+                       verify_and_update_password)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=ClientRead, status_code=201)
-def register(payload: ClientCreate, db: Session = Depends(get_db)):
-    existing = db.query(Client).filter(Client.email == payload.email).first()
+async def register(payload: ClientCreate, db: AsyncSession = Depends(get_db)):
+    existing = (await db.execute(select(Client).where(Client.email == payload.email))).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=409, detail="Email já cadastrado")
     client = Client(name=payload.name, email=payload.email,
-                    password_hash=hash_password(payload.password), role="user")
+                    password_hash=await hash_password_async(payload.password), role="user")
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
     return client
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(Client).filter(Client.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = (await db.execute(select(Client).where(Client.email == form_data.username))).scalar_one_or_none()
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
-    token = create_access_token(user.email)
+    valid, new_hash = await verify_and_update_password(form_data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    token = create_access_token(user.email, user.id)
     return Token(access_token=token)
 
 
 @router.get("/me", response_model=ClientRead)
-def get_me(current: Client = Depends(get_current_active_user)):
+async def get_me(current: ClientRead = Depends(get_current_active_user)):
     return current
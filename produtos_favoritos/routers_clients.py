@@ -1,69 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import io
 
-from .database import get_db
-from .deps import get_current_active_user, get_current_admin
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .bulk_import import (detect_format, import_clients, read_records,
+                          thread_pool_hasher)
+from .config import get_settings
+from .database import get_db, get_read_db
+from .deps import (get_current_active_user, get_current_admin,
+                   invalidate_principal)
+from .export import iter_export_ndjson
 from .models import Client
-from .schemas import ClientCreate, ClientRead, ClientUpdate
-from .security import hash_password
+from .pagination import PageParams, finish_page, paginate
+from .popularity import discount_client_favorites
+from .schemas import (ClientCreate, ClientImportResult, ClientRead,
+                      ClientUpdate)
+from .security import hash_password_async
+from .serialization import CLIENT_LIST, json_response
 
 router = APIRouter(prefix="/clients", tags=["clients"])
+settings = get_settings()
 
 
 @router.get("/", response_model=list[ClientRead])
-def list_clients(db: Session = Depends(get_db), _: Client = Depends(get_current_admin)):
-    return db.query(Client).all()
+async def list_clients(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db), _: ClientRead = Depends(get_current_admin)):
+    if settings.fast_json_responses:
+        stmt = paginate(select(Client.id, Client.name, Client.email, Client.role, Client.created_at),
+                        Client.created_at, Client.id, page)
+        rows = finish_page((await db.execute(stmt)).all(), page, response)
+        return json_response(CLIENT_LIST, [row._asdict() for row in rows], response)
+    stmt = paginate(select(Client), Client.created_at, Client.id, page)
+    return finish_page((await db.execute(stmt)).scalars().all(), page, response)
+
+
+@router.get("/export")
+async def export_clients(gzip: bool = False, db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    """Exporta todos os clientes com seus favoritos em NDJSON, em streaming."""
+    bind = db.bind
+
+    async def body():
+        # A sessão da requisição é fechada antes do streaming; usa uma própria no mesmo engine.
+        async with AsyncSession(bind=bind, autoflush=False, expire_on_commit=False) as session:
+            async for chunk in iter_export_ndjson(session, gzip=gzip):
+                yield chunk
+
+    filename = "clients.ndjson.gz" if gzip else "clients.ndjson"
+    return StreamingResponse(
+        body(), media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 @router.get("/{client_id}", response_model=ClientRead)
-def get_client(client_id: int, db: Session = Depends(get_db), _: Client = Depends(get_current_admin)):
-    client = db.query(Client).filter(Client.id == client_id).first()
+async def get_client(client_id: int, db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    client = await db.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return client
 
 
 @router.post("/", response_model=ClientRead, status_code=201)
-def create_client(payload: ClientCreate, role: str = "user", db: Session = Depends(get_db), _: Client = Depends(get_current_admin)):
-    existing = db.query(Client).filter(Client.email == payload.email).first()
+async def create_client(payload: ClientCreate, role: str = "user", db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    existing = (await db.execute(select(Client).where(Client.email == payload.email))).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=409, detail="Email já cadastrado")
     if role not in ["user", "admin"]:
         raise HTTPException(status_code=400, detail="Role inválida")
     client = Client(name=payload.name, email=payload.email,
-                    password_hash=hash_password(payload.password), role=role)
+                    password_hash=await hash_password_async(payload.password), role=role)
     db.add(client)
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
     return client
 
 
+@router.post("/import", response_model=ClientImportResult)
+async def import_clients_file(file: UploadFile, db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    """Importa clientes em lote de um CSV (name,email,password[,role]) ou NDJSON."""
+    fmt = detect_format(file.filename, file.content_type)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return await import_clients(db, read_records(stream, fmt), thread_pool_hasher())
+
+
 @router.patch("/me", response_model=ClientRead)
-def update_me(payload: ClientUpdate, db: Session = Depends(get_db), current: Client = Depends(get_current_active_user)):
+async def update_me(payload: ClientUpdate, db: AsyncSession = Depends(get_db), current: ClientRead = Depends(get_current_active_user)):
+    client = await db.get(Client, current.id)
+    if not client:
+        # Removido enquanto o principal ainda estava em cache (em outro worker).
+        invalidate_principal(current.id)
+        raise HTTPException(status_code=401, detail="Credenciais inválidas",
+                            headers={"WWW-Authenticate": "Bearer"})
     if payload.name is not None:
-        current.name = payload.name
-    db.commit()
-    db.refresh(current)
-    return current
+        client.name = payload.name
+    await db.commit()
+    await db.refresh(client)
+    invalidate_principal(client.id)
+    return client
 
 
 @router.patch("/{client_id}", response_model=ClientRead)
-def update_client(client_id: int, payload: ClientUpdate, db: Session = Depends(get_db), _: Client = Depends(get_current_admin)):
-    client = db.query(Client).filter(Client.id == client_id).first()
+async def update_client(client_id: int, payload: ClientUpdate, db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    client = await db.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     if payload.name is not None:
         client.name = payload.name
-    db.commit()
-    db.refresh(client)
+    await db.commit()
+    await db.refresh(client)
+    invalidate_principal(client.id)
     return client
 
 
 @router.delete("/{client_id}", status_code=204)
-def delete_client(client_id: int, db: Session = Depends(get_db), _: Client = Depends(get_current_admin)):
-    client = db.query(Client).filter(Client.id == client_id).first()
+async def delete_client(client_id: int, db: AsyncSession = Depends(get_db), _: ClientRead = Depends(get_current_admin)):
+    client = await db.get(Client, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    db.delete(client)
-    db.commit()
+    await discount_client_favorites(db, client_id)
+    await db.delete(client)
+    await db.commit()
+    invalidate_principal(client_id)
     return None
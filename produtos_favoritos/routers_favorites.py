@@ -1,46 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 
-from .database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .database import get_db, get_read_db
 from .deps import get_current_active_user
-from .models import Client, Favorite, Product
-from .products_service import get_or_refresh_product
-from .schemas import FavoriteRead
+from .etag import etag_matches, favorites_etag
+from .models import Client, Favorite
+from .pagination import PageParams, finish_page, paginate
+from .popularity import add_to_favorites_count
+from .products_service import (get_or_refresh_product, get_or_refresh_products,
+                               get_or_refresh_products_with_errors)
+from .schemas import (ClientRead, FavoriteBatchCreate, FavoriteBatchItem,
+                      FavoriteRead)
+from .serialization import FAVORITE_LIST, json_response
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
+settings = get_settings()
+
+
+async def touch_favorites(db: AsyncSession, client_id: int) -> None:
+    """Marca a alteração dos favoritos do cliente (base da ETag da listagem)."""
+    await db.execute(update(Client).where(Client.id == client_id)
+                     .values(favorites_updated_at=datetime.utcnow()))
+
+
+async def favorites_updated_at(db: AsyncSession, client_id: int) -> datetime | None:
+    """Última alteração dos favoritos, lida do primário (o principal em cache pode estar defasado)."""
+    return (await db.execute(select(Client.favorites_updated_at)
+                             .where(Client.id == client_id))).scalar_one_or_none()
+
+
+def wrote_recently(updated_at: datetime | None) -> bool:
+    """Se o cliente alterou os favoritos há pouco, a réplica pode ainda não ter a mudança."""
+    return updated_at is not None and datetime.utcnow() - updated_at < \
+        timedelta(seconds=settings.replica_read_your_writes_seconds)
+
+
+def is_not_found(error: BaseException | None) -> bool:
+    return isinstance(error, HTTPException) and error.status_code == 404
 
 
 @router.get("/", response_model=list[FavoriteRead])
-async def list_favorites(db: Session = Depends(get_db), current: Client = Depends(get_current_active_user)):
-    favorites = db.query(Favorite).filter(
-        Favorite.client_id == current.id).all()
+async def list_favorites(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_db), read_db: AsyncSession = Depends(get_read_db), current: ClientRead = Depends(get_current_active_user)):
+    updated_at = await favorites_updated_at(db, current.id)
+    etag = favorites_etag(current.id, updated_at, page)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    stmt = paginate(select(Favorite.id, Favorite.product_id, Favorite.created_at).where(
+        Favorite.client_id == current.id), Favorite.created_at, Favorite.id, page)
+    source = db if wrote_recently(updated_at) else read_db
+    favorites = finish_page((await source.execute(stmt)).all(), page, response)
+    # Produtos podem ser atualizados (escrita), então ficam no primário.
+    products = await get_or_refresh_products(db, [fav.product_id for fav in favorites])
+    if settings.fast_json_responses:
+        return json_response(FAVORITE_LIST, [
+            {"product": products[fav.product_id], "created_at": fav.created_at}
+            for fav in favorites if fav.product_id in products], response)
+    return [FavoriteRead(product=products[fav.product_id], created_at=fav.created_at)
+            for fav in favorites if fav.product_id in products]
+
+
+@router.post("/batch", response_model=list[FavoriteBatchItem])
+async def add_favorites_batch(payload: FavoriteBatchCreate, db: AsyncSession = Depends(get_db), current: ClientRead = Depends(get_current_active_user)):
+    product_ids = list(dict.fromkeys(payload.product_ids))
+    existing = set((await db.execute(select(Favorite.product_id).where(
+        Favorite.client_id == current.id, Favorite.product_id.in_(product_ids)))).scalars())
+    new_ids = [product_id for product_id in product_ids if product_id not in existing]
+    products, errors = await get_or_refresh_products_with_errors(db, new_ids) if new_ids else ({}, {})
+    created = {product_id: Favorite(client_id=current.id, product_id=product_id)
+               for product_id in new_ids if product_id in products}
+    if created:
+        db.add_all(created.values())
+        await add_to_favorites_count(db, list(created), 1)
+        await touch_favorites(db, current.id)
+        await db.commit()
+
     result = []
-    for fav in favorites:
-        product = await get_or_refresh_product(db, fav.product_id)
-        result.append(FavoriteRead(product=product, created_at=fav.created_at))
+    seen = set()
+    for product_id in payload.product_ids:
+        if product_id in created and product_id not in seen:
+            favorite = FavoriteRead(
+                product=products[product_id], created_at=created[product_id].created_at)
+            result.append(FavoriteBatchItem(
+                product_id=product_id, status="created", favorite=favorite))
+        elif product_id in existing or product_id in created:
+            result.append(FavoriteBatchItem(
+                product_id=product_id, status="duplicate"))
+        elif is_not_found(errors.get(product_id)):
+            result.append(FavoriteBatchItem(
+                product_id=product_id, status="not_found"))
+        else:
+            # API externa fora do ar: o produto pode existir, tente de novo depois.
+            result.append(FavoriteBatchItem(
+                product_id=product_id, status="unavailable"))
+        seen.add(product_id)
     return result
 
 
 @router.post("/{product_id}", response_model=FavoriteRead, status_code=201)
-async def add_favorite(product_id: int, db: Session = Depends(get_db), current: Client = Depends(get_current_active_user)):
-    existing = db.query(Favorite).filter(
-        Favorite.client_id == current.id, Favorite.product_id == product_id).first()
+async def add_favorite(product_id: int, db: AsyncSession = Depends(get_db), current: ClientRead = Depends(get_current_active_user)):
+    existing = (await db.execute(select(Favorite).where(
+        Favorite.client_id == current.id, Favorite.product_id == product_id))).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=409, detail="Produto já favoritado")
     product = await get_or_refresh_product(db, product_id)
     favorite = Favorite(client_id=current.id, product_id=product.id)
     db.add(favorite)
-    db.commit()
-    db.refresh(favorite)
+    await add_to_favorites_count(db, [product.id], 1)
+    await touch_favorites(db, current.id)
+    await db.commit()
+    await db.refresh(favorite)
     return FavoriteRead(product=product, created_at=favorite.created_at)
 
 
 @router.delete("/{product_id}", status_code=204)
-async def remove_favorite(product_id: int, db: Session = Depends(get_db), current: Client = Depends(get_current_active_user)):
-    favorite = db.query(Favorite).filter(
-        Favorite.client_id == current.id, Favorite.product_id == product_id).first()
+async def remove_favorite(product_id: int, db: AsyncSession = Depends(get_db), current: ClientRead = Depends(get_current_active_user)):
+    favorite = (await db.execute(select(Favorite).where(
+        Favorite.client_id == current.id, Favorite.product_id == product_id))).scalar_one_or_none()
     if not favorite:
         raise HTTPException(status_code=404, detail="Favorito não encontrado")
-    db.delete(favorite)
-    db.commit()
+    await db.delete(favorite)
+    await add_to_favorites_count(db, [product_id], -1)
+    await touch_favorites(db, current.id)
+    await db.commit()
     return None
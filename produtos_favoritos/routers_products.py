@@ -1,16 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .database import get_db
+from .catalog import CatalogSort, browse_products
+from .database import get_db, get_read_db
+from .etag import etag_matches, product_etag
+from .pagination import NEXT_CURSOR_HEADER, PageParams
+from .popularity import popular_products
 from .products_service import get_or_refresh_product
-from .schemas import ProductRead
+from .schemas import ProductPopularity, ProductRead
+from .search import decode_offset_cursor, encode_offset_cursor, search_products
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+@router.get("/", response_model=list[ProductRead])
+async def list_products(
+    response: Response,
+    sort: CatalogSort = "id",
+    min_price: float | None = Query(default=None, ge=0),
+    max_price: float | None = Query(default=None, ge=0),
+    min_rating: float | None = Query(default=None, ge=0, le=5),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Lista o catálogo local; `sort` aceita `id`, `price`, `-price`, `rating` e `-rating`."""
+    products, next_cursor = await browse_products(
+        db, sort, page.limit, page.cursor, min_price, max_price, min_rating)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return products
+
+
+@router.get("/popular", response_model=list[ProductPopularity])
+async def list_popular_products(limit: int = Query(default=10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    return await popular_products(db, limit)
+
+
+@router.get("/search", response_model=list[ProductRead])
+async def search(response: Response, q: str = Query(min_length=1, max_length=200), page: PageParams = Depends(), db: AsyncSession = Depends(get_read_db)):
+    """Busca por título no catálogo local, ordenada por relevância."""
+    offset = decode_offset_cursor(page.cursor)
+    products = await search_products(db, q, offset, page.limit)
+    if len(products) > page.limit:
+        products = products[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_offset_cursor(offset + page.limit)
+    return products
+
+
 @router.get("/{product_id}", response_model=ProductRead)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     product = await get_or_refresh_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
+    etag = product_etag(product)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return product
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -23,6 +24,22 @@ class ClientRead(BaseModel):
         from_attributes = True
 
 
+class ClientImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class ClientImportResult(BaseModel):
+    processed: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    # Limitado às primeiras linhas com erro.
+    errors: list[ClientImportError] = []
+
+
 class ClientUpdate(BaseModel):
     name: str | None = Field(default=None, min_length=1, max_length=100)
 
@@ -38,14 +55,32 @@ class ProductRead(BaseModel):
     image: str
     price: float
     review: str | None = None
+    rating_rate: float | None = None
+    rating_count: int | None = None
+    # Usado internamente para o TTL do cache; não é serializado.
+    last_sync: datetime | None = Field(default=None, exclude=True)
 
     class Config:
         from_attributes = True
 
 
+class ProductPopularity(ProductRead):
+    favorites_count: int
+
+
 class FavoriteRead(BaseModel):
     product: ProductRead
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class FavoriteBatchCreate(BaseModel):
+    product_ids: list[int] = Field(min_length=1, max_length=100)
+
+
+class FavoriteBatchItem(BaseModel):
+    product_id: int
+    status: Literal["created", "duplicate", "not_found", "unavailable"]
+    favorite: FavoriteRead | None = None
@@ -0,0 +1,68 @@
+"""Busca textual nos títulos do catálogo local, sem chamar a API externa.
+
+PostgreSQL: `to_tsvector('english', title)` com índice GIN e ranking por
+`ts_rank`. SQLite: tabela FTS5 `products_fts` com ranking por `bm25`.
+Todos os termos precisam aparecer; cada termo casa também como prefixo
+("shir" encontra "Shirt").
+"""
+import base64
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import PRODUCTS_FTS_TABLE, Product
+
+TS_CONFIG = "english"
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q: str) -> list[str]:
+    """Termos da busca; pontuação e operadores são descartados."""
+    return TERM_RE.findall(q.lower())[:10]
+
+
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return offset
+
+
+def _postgresql_stmt(terms: list[str]):
+    config = literal_column(f"'{TS_CONFIG}'")
+    query = func.to_tsquery(config, " & ".join(f"{term}:*" for term in terms))
+    vector = func.to_tsvector(config, Product.title)
+    return (select(Product).where(vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), Product.id))
+
+
+def _sqlite_stmt(terms: list[str]):
+    fts = table(PRODUCTS_FTS_TABLE, column("rowid"), column("title"))
+    match = " ".join(f'"{term}"*' for term in terms)
+    return (select(Product).join(fts, fts.c.rowid == Product.id)
+            .where(fts.c.title.match(match))
+            .order_by(func.bm25(literal_column(PRODUCTS_FTS_TABLE)), Product.id))
+
+
+async def search_products(db: AsyncSession, q: str, offset: int, limit: int) -> list[Product]:
+    """Produtos cujo título casa com `q`, do mais relevante ao menos relevante.
+
+    Busca `limit + 1` itens para saber se há próxima página.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    build = _postgresql_stmt if db.bind.dialect.name == "postgresql" else _sqlite_stmt
+    stmt = build(terms).offset(offset).limit(limit + 1)
+    return list((await db.execute(stmt)).scalars())
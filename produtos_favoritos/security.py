@@ -1,12 +1,27 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
 
 from .config import get_settings
+from .metrics import (PASSWORD_HASH_QUEUED, PASSWORD_HASH_REJECTED,
+                      PASSWORD_HASH_RUNNING, PASSWORD_HASH_SECONDS,
+                      PASSWORD_HASH_WAIT)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
+# min/max iguais ao custo configurado: hashes com outro custo são marcados por
+# `needs_update` e regravados no próximo login bem-sucedido.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 
 def hash_password(password: str) -> str:
@@ -17,7 +32,110 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
-def create_access_token(subject: str) -> str:
+class PasswordHasher:
+    """Executa o bcrypt fora do event loop, num pool de threads dedicado.
+
+    O pool limita quantos hashes rodam ao mesmo tempo (`password_hash_workers`);
+    pedidos além de `password_hash_max_queue` na fila são recusados com 503.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                PASSWORD_HASH_REJECTED.inc()
+                raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente",
+                                    headers={"Retry-After": "1"})
+            self.queued += 1
+            PASSWORD_HASH_QUEUED.inc()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="password-hash")
+            executor = self._executor
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            PASSWORD_HASH_WAIT.observe(started - submitted)
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds += started - submitted
+                PASSWORD_HASH_QUEUED.dec()
+                PASSWORD_HASH_RUNNING.inc()
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started
+                PASSWORD_HASH_SECONDS.observe(elapsed)
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    PASSWORD_HASH_RUNNING.dec()
+                    self.hash_seconds += elapsed
+
+        def release_if_cancelled(future):
+            # Cancelado ainda na fila (requisição abortada): `task` não roda e não desconta.
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+                    PASSWORD_HASH_QUEUED.dec()
+
+        future = executor.submit(task)
+        future.add_done_callback(release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds": self.wait_seconds,
+                "hash_seconds": self.hash_seconds,
+            }
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_workers, settings.password_hash_max_queue)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Verifica a senha e, se o hash usa parâmetros antigos, devolve o novo hash."""
+    return await password_hasher.run(pwd_context.verify_and_update, password, hashed)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verifica assinatura e expiração; levanta `JWTError` se o token for inválido."""
+    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+
+
+def create_access_token(subject: str, client_id: int | None = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     to_encode = {"sub": subject, "exp": expire}
+    if client_id is not None:
+        to_encode["id"] = client_id
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
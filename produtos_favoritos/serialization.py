@@ -0,0 +1,44 @@
+"""Serialização rápida das listagens (opt-in via `fast_json_responses`).
+
+No caminho padrão o FastAPI valida de novo o retorno contra o `response_model`
+e depois codifica com o `json` da stdlib. Aqui as linhas já vêm com o formato
+da resposta e são serializadas direto para bytes por `TypeAdapter`s compilados
+uma única vez, sem a segunda validação.
+"""
+from datetime import datetime
+
+from fastapi import Response
+from pydantic import TypeAdapter
+# O pydantic exige o TypedDict do typing_extensions em Python < 3.12.
+from typing_extensions import TypedDict
+
+from .schemas import ProductRead
+
+
+class ClientRow(TypedDict):
+    id: int
+    name: str
+    email: str
+    role: str
+    created_at: datetime
+
+
+class FavoriteRow(TypedDict):
+    product: ProductRead
+    created_at: datetime
+
+
+CLIENT_LIST = TypeAdapter(list[ClientRow])
+FAVORITE_LIST = TypeAdapter(list[FavoriteRow])
+
+
+class PreSerializedJSONResponse(Response):
+    """Resposta cujo conteúdo já são os bytes do JSON."""
+    media_type = "application/json"
+
+
+def json_response(adapter: TypeAdapter, items: list, response: Response) -> PreSerializedJSONResponse:
+    """Serializa `items` com o adapter, preservando os headers já definidos (ETag, cursor)."""
+    headers = {key: value for key, value in response.headers.items()
+               if key != "content-length"}
+    return PreSerializedJSONResponse(adapter.dump_json(items), headers=headers)
@@ -0,0 +1,24 @@
+"""Script para recalcular os contadores de favoritos dos produtos.
+Uso: python repair_popularity.py
+"""
+import asyncio
+
+from produtos_favoritos.database import AsyncSessionLocal, dispose_engines
+from produtos_favoritos.popularity import recompute_favorites_count
+
+
+async def run():
+    try:
+        async with AsyncSessionLocal() as db:
+            await recompute_favorites_count(db)
+        print("Contadores de favoritos recalculados.")
+    finally:
+        await dispose_engines()
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,10 @@ Uso: python seeds_create_admin.py <nome> <email> <senha>
 """
 import sys
 
-from produtos_favoritos.database import Base, SessionLocal, engine
+from produtos_favoritos.database import SessionLocal
 from produtos_favoritos.models import Client
 from produtos_favoritos.security import hash_password
 
-Base.metadata.create_all(bind=engine)
-
 
 def main():
     if len(sys.argv) < 4:
@@ -0,0 +1,27 @@
+"""Script para sincronizar o catálogo completo da FakeStore API.
+Uso: python sync_catalog.py
+"""
+import asyncio
+
+from produtos_favoritos.catalog_sync import sync_catalog
+from produtos_favoritos.database import AsyncSessionLocal, dispose_engines
+from produtos_favoritos.http_client import close_http_client
+
+
+async def run():
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await sync_catalog(db)
+        print(f"Catálogo sincronizado: {result['inserted']} inseridos, "
+              f"{result['updated']} atualizados, {result['unchanged']} inalterados.")
+    finally:
+        await close_http_client()
+        await dispose_engines()
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,46 +2,73 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from produtos_favoritos.database import Base, get_db
+from produtos_favoritos.database import Base, get_db, to_async_url
+from produtos_favoritos.deps import principal_cache
 from produtos_favoritos.main import app
 from produtos_favoritos.models import Client
+from produtos_favoritos.http_client import fakestore_breaker
+from produtos_favoritos.products_service import not_found_cache, product_cache
+from produtos_favoritos.rate_limit import rate_limit_backend
 from produtos_favoritos.security import hash_password
 
-# Banco de dados em memória para testes
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine)
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Limpa os caches em memória entre os testes."""
+    product_cache.clear()
+    not_found_cache.clear()
+    principal_cache.clear()
+    fakestore_breaker.reset()
+    rate_limit_backend.clear()
+    yield
+    product_cache.clear()
+    not_found_cache.clear()
+    principal_cache.clear()
+    fakestore_breaker.reset()
+    rate_limit_backend.clear()
 
 
 @pytest.fixture
-def db_session():
+def database_url(tmp_path):
+    """Banco SQLite em arquivo temporário, compartilhado pelas sessões síncrona e assíncrona."""
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
+@pytest.fixture
+def db_session(database_url):
     """Cria uma sessão de banco de dados para cada teste."""
+    engine = create_engine(database_url, connect_args={
+                           "check_same_thread": False})
     Base.metadata.create_all(bind=engine)
+    TestingSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def async_session_factory(database_url, db_session):
+    """Fábrica de sessões assíncronas apontando para o banco de teste."""
+    engine = create_async_engine(
+        to_async_url(database_url), poolclass=NullPool)
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture
-def client(db_session):
+def client(async_session_factory):
     """Cria um cliente de teste com banco de dados mockado."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
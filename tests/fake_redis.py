@@ -0,0 +1,141 @@
+"""Servidor local que imita o Redis (protocolo RESP2) para os testes do cache.
+
+Implementa só o que o backend usa: GET, SET (PX), PTTL, DEL, PUBLISH, SUBSCRIBE
+e os comandos de handshake do cliente. Roda num event loop próprio, numa thread.
+"""
+import asyncio
+import threading
+import time
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, Exception):
+        return b"-ERR " + str(value).encode() + b"\r\n"
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    return b"$%d\r\n" % len(value) + value + b"\r\n"
+
+
+async def _read_command(reader: asyncio.StreamReader) -> list[bytes]:
+    header = await reader.readline()
+    if not header:
+        raise ConnectionError
+    count = int(header[1:])
+    args = []
+    for _ in range(count):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.subscribers: dict[bytes, set[asyncio.StreamWriter]] = {}
+        self.commands: list[bytes] = []
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+
+    def start(self) -> None:
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, "127.0.0.1", 0))
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+    def drop_subscribers(self) -> None:
+        """Derruba as conexões inscritas em canais, como numa queda de rede."""
+        def drop():
+            for subscribers in self.subscribers.values():
+                for writer in list(subscribers):
+                    writer.close()
+                subscribers.clear()
+        self.loop.call_soon_threadsafe(drop)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def _get(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return entry
+
+    def _execute(self, args: list[bytes], writer: asyncio.StreamWriter):
+        command = args[0].upper()
+        self.commands.append(command)
+        if command == b"GET":
+            entry = self._get(args[1])
+            return entry[0] if entry else None
+        if command == b"SET":
+            expires_at = None
+            options = [arg.upper() for arg in args[3:]]
+            if b"PX" in options:
+                expires_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires_at)
+            return "OK"
+        if command == b"PTTL":
+            entry = self._get(args[1])
+            if entry is None:
+                return -2
+            return -1 if entry[1] is None else int((entry[1] - time.time()) * 1000)
+        if command == b"DEL":
+            return sum(self.data.pop(key, None) is not None for key in args[1:])
+        if command == b"PUBLISH":
+            receivers = self.subscribers.get(args[1], set())
+            for receiver in receivers:
+                receiver.write(_encode([b"message", args[1], args[2]]))
+            return len(receivers)
+        if command == b"SUBSCRIBE":
+            replies = []
+            for channel in args[1:]:
+                self.subscribers.setdefault(channel, set()).add(writer)
+                replies.append(_encode([b"subscribe", channel, 1]))
+            return b"".join(replies), True
+        if command in (b"PING",):
+            return "PONG"
+        if command in (b"CLIENT", b"SELECT"):
+            return "OK"
+        return Exception(f"comando não suportado: {command.decode()}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                reply = self._execute(await _read_command(reader), writer)
+                if isinstance(reply, tuple):
+                    writer.write(reply[0])
+                else:
+                    writer.write(_encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for subscribers in self.subscribers.values():
+                subscribers.discard(writer)
+            writer.close()
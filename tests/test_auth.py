@@ -79,3 +79,82 @@ def test_get_me_unauthenticated(client):
     """Testa endpoint /me sem autenticação."""
     response = client.get("/auth/me")
     assert response.status_code == 401
+
+
+def test_token_carries_id_claim(client, user_token, test_user):
+    """Token contém a claim imutável de id; a role vem do cliente em cache."""
+    from jose import jwt
+
+    from produtos_favoritos.config import get_settings
+
+    settings = get_settings()
+    payload = jwt.decode(user_token, settings.jwt_secret,
+                         algorithms=[settings.jwt_algorithm])
+    assert payload["id"] == test_user.id
+    assert "role" not in payload
+
+
+def test_current_user_served_from_principal_cache(client, user_token):
+    """Requisições autenticadas seguintes usam o cache de principais."""
+    from produtos_favoritos.deps import principal_cache
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.get("/auth/me", headers=headers)
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.stats()["hits"] == 1
+
+
+def test_login_rehashes_outdated_password_hash(client, db_session):
+    """Login bem-sucedido regrava hashes com custo diferente do configurado."""
+    from produtos_favoritos.models import Client
+    from produtos_favoritos.security import pwd_context
+
+    old_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("oldcost123")
+    user = Client(name="Old Cost", email="oldcost@example.com",
+                  password_hash=old_hash, role="user")
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post(
+        "/auth/login",
+        data={"username": "oldcost@example.com", "password": "oldcost123"}
+    )
+    assert response.status_code == 200
+    db_session.expire_all()
+    new_hash = db_session.get(Client, user.id).password_hash
+    assert new_hash != old_hash
+    assert not pwd_context.needs_update(new_hash)
+    assert pwd_context.verify("oldcost123", new_hash)
+
+
+def test_cancelled_hash_requests_release_queue():
+    """Pedidos cancelados ainda na fila do bcrypt liberam a vaga."""
+    import asyncio
+    import threading
+
+    from produtos_favoritos.security import PasswordHasher
+
+    hasher = PasswordHasher(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def run():
+        busy = asyncio.ensure_future(hasher.run(release.wait))
+        while hasher.stats()["running"] == 0:
+            await asyncio.sleep(0.01)
+        waiters = [asyncio.ensure_future(hasher.run(lambda: "hash")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert hasher.stats()["queued"] == 0
+        release.set()
+        await busy
+        assert await hasher.run(lambda: "ok") == "ok"
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert hasher.stats()["queued"] == 0
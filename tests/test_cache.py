@@ -0,0 +1,214 @@
+"""Testes para o cache LRU em memória e o backend Redis."""
+import asyncio
+import time
+
+import pytest
+
+from produtos_favoritos.cache import LRUCache
+
+
+def test_lru_cache_hit_and_miss():
+    """Itens válidos são servidos do cache e contabilizados."""
+    cache = LRUCache(maxsize=2)
+    cache.set(1, "a", time.time() + 60)
+    assert cache.get(1) == "a"
+    assert cache.get(2) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Ao exceder o tamanho máximo, o item menos usado é descartado."""
+    cache = LRUCache(maxsize=2)
+    expires_at = time.time() + 60
+    cache.set(1, "a", expires_at)
+    cache.set(2, "b", expires_at)
+    cache.get(1)
+    cache.set(3, "c", expires_at)
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expired_entry_is_miss():
+    """Itens expirados não são retornados."""
+    cache = LRUCache(maxsize=2)
+    cache.set(1, "a", time.time() - 1)
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_cache_reports_evictions_and_size():
+    """Descartes e mudanças de tamanho são repassados aos callbacks de métricas."""
+    evictions = []
+    sizes = []
+    cache = LRUCache(maxsize=1, on_evict=lambda: evictions.append(1), on_resize=sizes.append)
+    expires_at = time.time() + 60
+    cache.set(1, "a", expires_at)
+    cache.set(2, "b", expires_at)
+    cache.invalidate(2)
+    assert evictions == [1]
+    assert sizes == [1, 1, 0]
+
+
+@pytest.fixture
+def redis_server():
+    """Servidor local que faz papel do Redis."""
+    from tests.fake_redis import FakeRedisServer
+
+    server = FakeRedisServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_redis_backend(url, local_ttl=60):
+    from produtos_favoritos.cache import RedisCacheBackend
+
+    return RedisCacheBackend(url, "test:product", str.encode, bytes.decode, int,
+                             local_maxsize=100, local_ttl=local_ttl)
+
+
+def test_redis_backend_shares_values_between_replicas(redis_server):
+    """O que uma réplica grava é lido pelas outras, num único pipeline para vários ids."""
+    async def run():
+        replica_a = make_redis_backend(redis_server.url)
+        replica_b = make_redis_backend(redis_server.url)
+        await replica_a.set(1, "um", time.time() + 60)
+        await replica_a.set(2, "dois", time.time() + 60)
+        found = await replica_b.get_many([1, 2, 3])
+        # Segunda leitura sai do near-cache, sem ir ao Redis.
+        gets_before = redis_server.commands.count(b"GET")
+        again = await replica_b.get_many([1, 2])
+        gets_after = redis_server.commands.count(b"GET")
+        await replica_a.close()
+        await replica_b.close()
+        return found, again, gets_after - gets_before
+
+    found, again, extra_gets = asyncio.run(run())
+    assert found == {1: "um", 2: "dois"}
+    assert again == {1: "um", 2: "dois"}
+    assert extra_gets == 0
+
+
+def test_redis_backend_respects_ttl(redis_server):
+    """Itens expiram no Redis com o TTL informado."""
+    async def run():
+        backend = make_redis_backend(redis_server.url)
+        await backend.set(1, "um", time.time() + 0.05)
+        await backend.set(2, "já expirado", time.time() - 1)
+        backend.clear()
+        await asyncio.sleep(0.1)
+        found = await backend.get_many([1, 2])
+        await backend.close()
+        return found
+
+    assert asyncio.run(run()) == {}
+
+
+def test_redis_backend_invalidation_reaches_other_replicas(redis_server):
+    """A invalidação é publicada e remove o item do near-cache das outras réplicas."""
+    async def run():
+        replica_a = make_redis_backend(redis_server.url)
+        replica_b = make_redis_backend(redis_server.url)
+        await replica_b.start()
+        await replica_a.set(1, "antigo", time.time() + 60)
+        assert await replica_b.get_many([1]) == {1: "antigo"}
+
+        await replica_a.invalidate(1)
+        for _ in range(50):
+            if replica_b.local.get(1) is None:
+                break
+            await asyncio.sleep(0.01)
+        found = await replica_b.get_many([1])
+        await replica_a.close()
+        await replica_b.close()
+        return found
+
+    assert asyncio.run(run()) == {}
+
+
+def test_redis_backend_degrades_when_redis_is_down():
+    """Com o Redis fora do ar a aplicação sobe e o cache só perde a camada compartilhada."""
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+
+    async def run():
+        backend = make_redis_backend(f"redis://127.0.0.1:{closed_port}/0")
+        await backend.start()
+        await backend.set(1, "um", time.time() + 60)
+        found = await backend.get_many([1, 2])
+        await backend.invalidate(1)
+        after = await backend.get_many([1])
+        await backend.close()
+        return found, after
+
+    assert asyncio.run(run()) == ({1: "um"}, {})
+
+
+def test_redis_backend_resubscribes_after_connection_loss(redis_server):
+    """Se a assinatura cai, ela é refeita e o near-cache é limpo (invalidações podem ter se perdido)."""
+    async def wait_for(condition):
+        for _ in range(200):
+            if condition():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def run():
+        replica_a = make_redis_backend(redis_server.url)
+        replica_b = make_redis_backend(redis_server.url)
+        replica_b.RECONNECT_MIN_SECONDS = 0.01
+        await replica_b.start()
+        assert await wait_for(lambda: redis_server.subscriber_count() == 1)
+        await replica_a.set(1, "antigo", time.time() + 60)
+        assert await replica_b.get_many([1]) == {1: "antigo"}
+
+        redis_server.drop_subscribers()
+        assert await wait_for(lambda: redis_server.subscriber_count() == 1)
+        assert await wait_for(lambda: replica_b.local.get(1) is None)
+
+        await replica_b.get_many([1])
+        await replica_a.invalidate(1)
+        invalidated = await wait_for(lambda: replica_b.local.get(1) is None)
+        await replica_a.close()
+        await replica_b.close()
+        return invalidated
+
+    assert asyncio.run(run())
+
+
+def test_products_served_from_shared_cache(redis_server, async_session_factory, monkeypatch):
+    """Com o backend Redis, uma réplica nova aproveita o produto já buscado por outra."""
+    from unittest.mock import patch
+
+    from produtos_favoritos import products_service
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": "Compartilhado",
+                "image": "http://example.com/image.jpg", "price": 5.0}
+
+    async def run():
+        monkeypatch.setattr(products_service.settings, "cache_backend", "redis")
+        monkeypatch.setattr(products_service.settings, "redis_url", redis_server.url)
+        for _ in range(2):
+            # Cada volta simula uma réplica com o cache local vazio.
+            backend = products_service.create_product_cache()
+            monkeypatch.setattr(products_service, "product_cache", backend)
+            async with async_session_factory() as db:
+                product = await products_service.get_or_refresh_product(db, 7)
+            await backend.close()
+        return product
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=fetch) as mock_fetch:
+        product = asyncio.run(run())
+
+    assert product.title == "Compartilhado"
+    assert product.last_sync is not None
+    assert mock_fetch.call_count == 1
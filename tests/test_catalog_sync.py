@@ -0,0 +1,40 @@
+"""Testes para a sincronização do catálogo."""
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from produtos_favoritos.catalog_sync import sync_catalog
+from produtos_favoritos.models import Product
+
+
+@patch("produtos_favoritos.catalog_sync.fetch_external_catalog")
+def test_sync_catalog_upserts_changed_rows(mock_fetch, db_session, async_session_factory):
+    """Sincronização insere novos, atualiza alterados e renova o last_sync dos demais."""
+    old = datetime.utcnow() - timedelta(days=30)
+    db_session.add_all([
+        Product(id=1, title="Same", image="http://example.com/1.jpg",
+                price=10.0, review=None, last_sync=old),
+        Product(id=2, title="Old title", image="http://example.com/2.jpg",
+                price=20.0, review=None, last_sync=old),
+    ])
+    db_session.commit()
+    mock_fetch.return_value = [
+        {"id": 1, "title": "Same", "image": "http://example.com/1.jpg", "price": 10.0},
+        {"id": 2, "title": "New title", "image": "http://example.com/2.jpg", "price": 20.0},
+        {"id": 3, "title": "Brand new", "image": "http://example.com/3.jpg", "price": 30.0,
+         "rating": {"rate": 4.0, "count": 7}},
+    ]
+
+    async def run():
+        async with async_session_factory() as db:
+            return await sync_catalog(db)
+
+    result = asyncio.run(run())
+
+    assert result == {"inserted": 1, "updated": 1, "unchanged": 1}
+    db_session.expire_all()
+    products = {product.id: product for product in db_session.query(Product).all()}
+    assert products[2].title == "New title"
+    assert products[3].review == "Rating: 4.0/5 (7 reviews)"
+    assert (products[3].rating_rate, products[3].rating_count) == (4.0, 7)
+    assert all(product.last_sync > old for product in products.values())
@@ -0,0 +1,71 @@
+"""Testes do circuit breaker da API externa."""
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from produtos_favoritos import circuit_breaker
+from produtos_favoritos.circuit_breaker import (CLOSED, HALF_OPEN, OPEN,
+                                                CircuitBreaker,
+                                                CircuitOpenError)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def fail(breaker, exc=None):
+    with pytest.raises(Exception):
+        with breaker.guard():
+            raise exc or httpx.ConnectError("falhou")
+
+
+def test_opens_after_threshold_and_fails_fast(clock):
+    """Após N falhas seguidas o circuito abre e recusa chamadas com 503."""
+    breaker = CircuitBreaker(failure_threshold=3, recovery_seconds=30)
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        with breaker.guard():
+            pytest.fail("chamada não deveria acontecer com o circuito aberto")
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "30"
+
+
+def test_not_found_does_not_count_as_failure(clock):
+    """404 da API externa é resposta válida e zera a contagem de falhas."""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=30)
+    fail(breaker)
+    fail(breaker, HTTPException(status_code=404, detail="não encontrado"))
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens(clock):
+    """Depois do intervalo só uma chamada de teste passa; sucesso fecha, falha reabre."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=30)
+    fail(breaker)
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+    fail(breaker)
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    with breaker.guard():
+        with pytest.raises(CircuitOpenError):
+            with breaker.guard():
+                pass
+    assert breaker.state == CLOSED
@@ -114,6 +114,18 @@ def test_update_me_as_user(client, user_token):
     assert data["name"] == "My New Name"
 
 
+def test_update_me_after_deletion_on_other_worker(client, user_token, test_user, db_session):
+    """Cliente removido em outro worker (principal ainda em cache aqui) recebe 401, não 500."""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    db_session.delete(test_user)
+    db_session.commit()
+
+    response = client.patch("/clients/me", json={"name": "Fantasma"}, headers=headers)
+    assert response.status_code == 401
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
 def test_delete_client_as_admin(client, admin_token, test_user):
     """Admin pode deletar clientes."""
     response = client.delete(
@@ -130,3 +142,149 @@ def test_delete_client_as_user(client, user_token, test_admin):
         headers={"Authorization": f"Bearer {user_token}"}
     )
     assert response.status_code == 403
+
+
+def test_list_clients_paginated(client, admin_token, test_user, db_session):
+    """Listagem de clientes é paginada por cursor."""
+    from produtos_favoritos.models import Client
+
+    for i in range(3):
+        db_session.add(Client(name=f"Extra {i}", email=f"extra{i}@example.com",
+                              password_hash="x", role="user"))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    first = client.get("/clients/", params={"limit": 3}, headers=headers)
+    assert first.status_code == 200
+    assert len(first.json()) == 3
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get("/clients/", params={"limit": 3, "cursor": cursor}, headers=headers)
+    assert second.status_code == 200
+    assert len(second.json()) == 2
+    assert "X-Next-Cursor" not in second.headers
+    ids = [c["id"] for c in first.json() + second.json()]
+    assert len(set(ids)) == 5
+
+
+def test_list_clients_invalid_cursor(client, admin_token):
+    """Cursor malformado retorna 400."""
+    response = client.get(
+        "/clients/",
+        params={"cursor": "invalido"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 400
+
+
+def test_deleted_client_token_rejected(client, admin_token, user_token, test_user):
+    """Token de cliente removido deixa de valer, mesmo com o principal em cache."""
+    user_headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.get("/auth/me", headers=user_headers).status_code == 200
+
+    client.delete(
+        f"/clients/{test_user.id}",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert client.get("/auth/me", headers=user_headers).status_code == 401
+
+
+def test_export_clients_ndjson(client, admin_token, test_user, db_session, monkeypatch):
+    """Exportação traz um cliente por linha, com favoritos, lendo em blocos."""
+    import gzip
+    import json
+
+    from produtos_favoritos import export
+    from produtos_favoritos.models import Favorite, Product
+
+    monkeypatch.setattr(export.settings, "export_chunk_size", 1)
+    db_session.add(Product(id=1, title="Produto", image="http://example.com/image.jpg", price=9.9))
+    db_session.add(Favorite(client_id=test_user.id, product_id=1))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get("/clients/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = {r["email"]: r for r in map(json.loads, response.text.splitlines())}
+    assert set(records) == {"test@example.com", "admin@example.com"}
+    assert records["test@example.com"]["favorites"][0]["product_id"] == 1
+    assert records["admin@example.com"]["favorites"] == []
+    assert "password_hash" not in records["test@example.com"]
+
+    compressed = client.get("/clients/export", params={"gzip": True}, headers=headers)
+    assert compressed.status_code == 200
+    assert gzip.decompress(compressed.content).decode() == response.text
+
+
+def test_export_clients_as_user(client, user_token):
+    """Usuário comum não pode exportar clientes."""
+    response = client.get(
+        "/clients/export", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+
+def test_import_clients_csv(client, admin_token, test_user):
+    """Importação em lote insere os novos e relata duplicados e linhas inválidas."""
+    body = (
+        "name,email,password,role\n"
+        "Novo 1,novo1@example.com,senha123,user\n"
+        "Novo 2,novo2@example.com,senha123,admin\n"
+        "Repetido,test@example.com,senha123,user\n"
+        "Repetido no arquivo,novo1@example.com,senha123,user\n"
+        "Sem email,,senha123,user\n"
+        "Role errada,novo3@example.com,senha123,root\n"
+    )
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/clients/import", headers=headers,
+                           files={"file": ("clientes.csv", body, "text/csv")})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["processed"] == 6
+    assert data["inserted"] == 2
+    assert data["duplicates"] == 2
+    assert data["invalid"] == 2
+    assert [error["line"] for error in data["errors"]] == [6, 7]
+
+    login = client.post("/auth/login", data={"username": "novo2@example.com", "password": "senha123"})
+    assert login.status_code == 200
+
+
+def test_import_clients_ndjson_in_batches(async_session_factory):
+    """NDJSON é importado em lotes, com progresso por lote."""
+    import asyncio
+    import io
+
+    from produtos_favoritos.bulk_import import (import_clients, read_records,
+                                                thread_pool_hasher)
+
+    lines = [f'{{"name": "Cliente {i}", "email": "c{i}@example.com", "password": "senha123"}}'
+             for i in range(5)]
+    stream = io.StringIO("\n".join(lines + ["não é json"]) + "\n")
+    progress = []
+
+    async def run():
+        async with async_session_factory() as db:
+            return await import_clients(
+                db, read_records(stream, "ndjson"), thread_pool_hasher(), batch_size=2,
+                on_progress=lambda result: progress.append(result.processed))
+
+    result = asyncio.run(run())
+    assert result.inserted == 5
+    assert result.invalid == 1
+    assert progress == [2, 4, 6]
+
+
+def test_list_clients_fast_json(client, admin_token, test_user, monkeypatch):
+    """O caminho rápido de serialização gera o mesmo JSON da listagem padrão."""
+    from produtos_favoritos import routers_clients
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    default = client.get("/clients/", params={"limit": 1}, headers=headers)
+    monkeypatch.setattr(routers_clients.settings, "fast_json_responses", True)
+    fast = client.get("/clients/", params={"limit": 1}, headers=headers)
+
+    assert fast.status_code == 200
+    assert fast.json() == default.json()
+    assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
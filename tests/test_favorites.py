@@ -140,3 +140,175 @@ def test_favorites_require_auth(client):
 
     response = client.delete("/favorites/1")
     assert response.status_code == 401
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_list_favorites_refreshes_expired_products(mock_fetch, client, user_token, test_user, db_session):
+    """Listagem atualiza os produtos expirados em lote, um fetch por produto."""
+    from datetime import datetime, timedelta
+
+    from produtos_favoritos.models import Favorite, Product
+
+    old = datetime.utcnow() - timedelta(days=30)
+    for product_id in (1, 2, 3):
+        db_session.add(Product(id=product_id, title=f"Old {product_id}",
+                               image="http://example.com/old.jpg", price=1.0, last_sync=old))
+        db_session.add(Favorite(client_id=test_user.id, product_id=product_id))
+    db_session.commit()
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": f"New {product_id}",
+                "image": "http://example.com/new.jpg", "price": 10.0}
+
+    mock_fetch.side_effect = fetch
+
+    response = client.get(
+        "/favorites/",
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 200
+    titles = sorted(item["product"]["title"] for item in response.json())
+    assert titles == ["New 1", "New 2", "New 3"]
+    assert mock_fetch.call_count == 3
+
+
+def test_list_favorites_paginated(client, user_token, test_user, db_session):
+    """Listagem de favoritos é paginada por cursor."""
+    from datetime import datetime
+
+    from produtos_favoritos.models import Favorite, Product
+
+    for product_id in (1, 2, 3):
+        db_session.add(Product(id=product_id, title=f"Product {product_id}",
+                               image="http://example.com/image.jpg", price=1.0,
+                               last_sync=datetime.utcnow()))
+        db_session.add(Favorite(client_id=test_user.id, product_id=product_id))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    first = client.get("/favorites/", params={"limit": 2}, headers=headers)
+    assert [item["product"]["id"] for item in first.json()] == [1, 2]
+    second = client.get(
+        "/favorites/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+    assert [item["product"]["id"] for item in second.json()] == [3]
+    assert "X-Next-Cursor" not in second.headers
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_add_favorites_batch(mock_fetch, client, user_token):
+    """Lote de favoritos informa o resultado de cada item."""
+    from fastapi import HTTPException
+
+    async def fetch(product_id):
+        if product_id == 99999:
+            raise HTTPException(
+                status_code=404, detail="Produto não encontrado na API externa")
+        return {"id": product_id, "title": f"Product {product_id}",
+                "image": "http://example.com/image.jpg", "price": 10.0}
+
+    mock_fetch.side_effect = fetch
+    headers = {"Authorization": f"Bearer {user_token}"}
+    client.post("/favorites/1", headers=headers)
+
+    response = client.post(
+        "/favorites/batch",
+        json={"product_ids": [1, 2, 3, 2, 99999]},
+        headers=headers
+    )
+    assert response.status_code == 200
+    statuses = [(item["product_id"], item["status"]) for item in response.json()]
+    assert statuses == [(1, "duplicate"), (2, "created"), (3, "created"),
+                        (2, "duplicate"), (99999, "not_found")]
+    assert response.json()[1]["favorite"]["product"]["title"] == "Product 2"
+
+    listing = client.get("/favorites/", headers=headers)
+    assert sorted(item["product"]["id"] for item in listing.json()) == [1, 2, 3]
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_add_favorites_batch_reports_upstream_outage(mock_fetch, client, user_token):
+    """Falha da API externa no lote é `unavailable`, não `not_found`."""
+    import httpx
+    from fastapi import HTTPException
+
+    async def fetch(product_id):
+        if product_id == 2:
+            raise httpx.ConnectTimeout("timeout")
+        if product_id == 99999:
+            raise HTTPException(
+                status_code=404, detail="Produto não encontrado na API externa")
+        return {"id": product_id, "title": f"Product {product_id}",
+                "image": "http://example.com/image.jpg", "price": 10.0}
+
+    mock_fetch.side_effect = fetch
+    response = client.post(
+        "/favorites/batch",
+        json={"product_ids": [1, 2, 99999]},
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 200
+    statuses = [(item["product_id"], item["status"]) for item in response.json()]
+    assert statuses == [(1, "created"), (2, "unavailable"), (99999, "not_found")]
+
+
+def test_favorites_etag_ignores_stale_principal_cache(client, user_token, test_user, db_session):
+    """Alteração feita por outro worker muda a ETag mesmo com o principal ainda em cache aqui."""
+    from datetime import datetime
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    etag = client.get("/favorites/", headers=headers).headers["ETag"]
+
+    test_user.favorites_updated_at = datetime.utcnow()
+    db_session.commit()
+
+    response = client.get("/favorites/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_list_favorites_conditional(mock_fetch, client, user_token):
+    """ETag da listagem muda quando os favoritos do cliente mudam."""
+    mock_fetch.return_value = {
+        "id": 1,
+        "title": "Test Product",
+        "image": "http://example.com/image.jpg",
+        "price": 29.99,
+    }
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    etag = client.get("/favorites/", headers=headers).headers["ETag"]
+    response = client.get("/favorites/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/favorites/1", headers=headers)
+    response = client.get("/favorites/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 1
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_list_favorites_fast_json(mock_fetch, client, user_token, monkeypatch):
+    """O caminho rápido de serialização gera o mesmo JSON e os mesmos headers."""
+    from produtos_favoritos import routers_favorites
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": f"Produto {product_id}",
+                "image": "http://example.com/image.jpg", "price": 10.5,
+                "rating": {"rate": 4.1, "count": 7}}
+
+    mock_fetch.side_effect = fetch
+    headers = {"Authorization": f"Bearer {user_token}"}
+    for product_id in (1, 2, 3):
+        client.post(f"/favorites/{product_id}", headers=headers)
+
+    default = client.get("/favorites/", params={"limit": 2}, headers=headers)
+    monkeypatch.setattr(routers_favorites.settings, "fast_json_responses", True)
+    fast = client.get("/favorites/", params={"limit": 2}, headers=headers)
+
+    assert fast.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == default.json()
+    assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
+    assert fast.headers["ETag"] == default.headers["ETag"]
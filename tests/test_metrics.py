@@ -0,0 +1,42 @@
+"""Testes para o endpoint de métricas."""
+from unittest.mock import patch
+
+
+def test_metrics_exposes_route_counters(client):
+    """Requisições aparecem por rota (template) no /metrics."""
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "db_pool_checked_out_connections" in body
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_metrics_track_product_cache(mock_fetch, client):
+    """Faltas, acertos e atualizações do cache de produtos são contabilizados."""
+    mock_fetch.return_value = {
+        "id": 1,
+        "title": "Test Product",
+        "image": "http://example.com/image.jpg",
+        "price": 29.99,
+    }
+    client.get("/products/1")
+    client.get("/products/1")
+    body = client.get("/metrics").text
+    for event in ("hit", "miss", "refresh", "eviction"):
+        assert f'product_cache_events_total{{event="{event}"}}' in body
+    assert "product_cache_items 1.0" in body
+    assert 'route="/products/{product_id}"' in body
+
+
+def test_metrics_track_password_hash_queue(client, test_user):
+    """Fila, execução, recusas e espera do pool de bcrypt aparecem no /metrics."""
+    client.post("/auth/login", data={"username": "test@example.com", "password": "testpass123"})
+    body = client.get("/metrics").text
+    assert "password_hash_queued_jobs 0.0" in body
+    assert "password_hash_running_jobs 0.0" in body
+    assert "password_hash_rejected_total" in body
+    assert "password_hash_queue_wait_seconds_count" in body
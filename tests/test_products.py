@@ -1,6 +1,8 @@
 """Testes para produtos."""
 from unittest.mock import AsyncMock, patch
 
+import pytest
+
 
 @patch("produtos_favoritos.products_service.fetch_external_product")
 def test_get_product_success(mock_fetch, client):
@@ -21,6 +23,7 @@ def test_get_product_success(mock_fetch, client):
     assert data["price"] == 29.99
     assert data["review"] is not None
     assert "4.5" in data["review"]
+    assert (data["rating_rate"], data["rating_count"]) == (4.5, 100)
 
 
 @patch("produtos_favoritos.products_service.fetch_external_product")
@@ -36,3 +39,443 @@ def test_get_product_not_found(mock_fetch, client):
 
     response = client.get("/products/99999")
     assert response.status_code == 404
+
+
+def test_http_client_shared_and_closed_with_lifespan():
+    """O client HTTP é único durante o lifespan e fechado no shutdown."""
+    from fastapi.testclient import TestClient
+
+    from produtos_favoritos import http_client
+    from produtos_favoritos.main import app
+
+    with TestClient(app):
+        shared = http_client.get_http_client()
+        assert http_client.get_http_client() is shared
+        assert not shared.is_closed
+    assert shared.is_closed
+
+
+def test_concurrent_refreshes_are_coalesced(async_session_factory):
+    """Atualizações simultâneas do mesmo produto fazem um único fetch externo."""
+    import asyncio
+
+    from produtos_favoritos.products_service import get_or_refresh_product
+
+    async def slow_fetch(product_id):
+        await asyncio.sleep(0.05)
+        return {"id": product_id, "title": "Coalesced", "image": "http://example.com/image.jpg",
+                "price": 10.0}
+
+    async def refresh():
+        async with async_session_factory() as db:
+            return await get_or_refresh_product(db, 1)
+
+    async def run():
+        return await asyncio.gather(*(refresh() for _ in range(5)))
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=slow_fetch) as mock_fetch:
+        products = asyncio.run(run())
+
+    assert mock_fetch.call_count == 1
+    assert {product.title for product in products} == {"Coalesced"}
+
+
+def test_follower_survives_cancelled_leader(async_session_factory):
+    """Se o líder da atualização é cancelado, quem esperava por ele assume o fetch."""
+    import asyncio
+
+    from produtos_favoritos.products_service import get_or_refresh_product
+
+    async def slow_fetch(product_id):
+        await asyncio.sleep(0.05)
+        return {"id": product_id, "title": "Retomado", "image": "http://example.com/image.jpg",
+                "price": 10.0}
+
+    async def refresh():
+        async with async_session_factory() as db:
+            return await get_or_refresh_product(db, 1)
+
+    async def run():
+        leader = asyncio.create_task(refresh())
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(refresh())
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=slow_fetch) as mock_fetch:
+        product = asyncio.run(run())
+
+    assert product.title == "Retomado"
+    assert mock_fetch.call_count == 2
+
+
+def test_product_locked_by_other_replica_is_reread(db_session, async_session_factory, monkeypatch):
+    """Produto novo travado por outra réplica não é buscado de novo: espera o commit dela e relê."""
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from produtos_favoritos import products_service
+    from produtos_favoritos.models import Product
+
+    class OtherReplicaHolds2:
+        async def try_acquire(self, keys):
+            return [key for key in keys if key != 2]
+
+        async def release(self, keys):
+            pass
+
+        async def wait(self, keys):
+            db_session.add(Product(id=2, title="Da outra réplica",
+                                   image="http://example.com/image.jpg", price=2.0))
+            db_session.commit()
+
+    @asynccontextmanager
+    async def fake_locks(db):
+        yield OtherReplicaHolds2()
+
+    monkeypatch.setattr(products_service, "advisory_locks", fake_locks)
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": "Buscado", "image": "http://example.com/image.jpg",
+                "price": 1.0}
+
+    async def run():
+        async with async_session_factory() as db:
+            return await products_service.refresh_products(db, [1, 2])
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=fetch) as mock_fetch:
+        products, errors = asyncio.run(run())
+
+    mock_fetch.assert_called_once_with(1)
+    assert errors == {}
+    assert products[2].title == "Da outra réplica"
+
+
+def test_locked_refresh_uses_one_connection_without_open_transaction(db_session, async_session_factory, monkeypatch):
+    """Com locks consultivos, a atualização ocupa uma só conexão e não deixa transação aberta durante a busca."""
+    import asyncio
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import event, select, text
+
+    from produtos_favoritos import products_service
+    from produtos_favoritos.models import Product
+
+    db_session.add(Product(id=1, title="Antigo", image="http://example.com/image.jpg",
+                           price=1.0, last_sync=datetime.utcnow() - timedelta(days=2)))
+    db_session.commit()
+
+    statements = []
+
+    async def execute(self, statement, params):
+        # SQLite não tem pg_try_advisory_lock: mesmo caminho de sessão, comando neutro.
+        statements.append(statement)
+        await self.db.execute(text("SELECT 1"))
+        await self.db.commit()
+        return params.get("keys", [])
+
+    monkeypatch.setattr(products_service, "supports_advisory_locks", lambda db: True)
+    monkeypatch.setattr(products_service.AdvisoryLocks, "execute", execute)
+
+    engine = async_session_factory.kw["bind"]
+    open_connections = []
+    peak = []
+
+    def checkout(*args):
+        open_connections.append(1)
+        peak.append(len(open_connections))
+
+    event.listen(engine.sync_engine, "checkout", checkout)
+    event.listen(engine.sync_engine, "checkin", lambda *args: open_connections.pop())
+    during_fetch = []
+
+    async def run():
+        async with async_session_factory() as db:
+            async def fetch(product_id):
+                during_fetch.append((len(open_connections), db.in_transaction()))
+                return {"id": product_id, "title": "Novo", "image": "http://example.com/image.jpg",
+                        "price": 2.0}
+
+            with patch("produtos_favoritos.products_service.fetch_external_product",
+                       side_effect=fetch):
+                await products_service.get_or_refresh_product(db, 1)
+            title = (await db.execute(select(Product.title).where(Product.id == 1))).scalar_one()
+            return title, db.bind
+
+    title, bind = asyncio.run(run())
+
+    assert title == "Novo"
+    assert during_fetch == [(1, False)]
+    assert max(peak) == 1
+    assert bind is engine
+    assert len(statements) == 2
+    assert open_connections == []
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_get_product_served_from_cache(mock_fetch, client):
+    """Produtos recém-lidos são servidos do cache L1 sem consultar o banco."""
+    from produtos_favoritos.products_service import product_cache
+
+    mock_fetch.return_value = {
+        "id": 1,
+        "title": "Test Product",
+        "image": "http://example.com/image.jpg",
+        "price": 29.99,
+    }
+
+    client.get("/products/1")
+    response = client.get("/products/1")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Test Product"
+    assert product_cache.stats()["hits"] == 1
+    assert mock_fetch.call_count == 1
+
+
+def test_stale_while_revalidate_serves_expired_product(db_session, async_session_factory, monkeypatch):
+    """Com stale-while-revalidate, o produto expirado é servido e atualizado em background."""
+    import asyncio
+    from datetime import datetime, timedelta
+
+    from produtos_favoritos import products_service
+    from produtos_favoritos.models import Product
+
+    monkeypatch.setattr(products_service.settings,
+                        "product_stale_while_revalidate", True)
+    last_sync = datetime.utcnow() - timedelta(
+        hours=products_service.settings.product_cache_ttl_hours + 1)
+    db_session.add(Product(id=1, title="Stale", image="http://example.com/image.jpg",
+                           price=1.0, last_sync=last_sync))
+    db_session.commit()
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": "Fresh", "image": "http://example.com/image.jpg",
+                "price": 2.0}
+
+    async def run():
+        async with async_session_factory() as db:
+            product = await products_service.get_or_refresh_product(db, 1)
+        await asyncio.gather(*products_service._background_tasks)
+        return product
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=fetch):
+        product = asyncio.run(run())
+
+    assert product.title == "Stale"
+    db_session.expire_all()
+    assert db_session.get(Product, 1).title == "Fresh"
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_get_product_conditional(mock_fetch, client):
+    """If-None-Match com a ETag atual retorna 304 sem corpo."""
+    mock_fetch.return_value = {
+        "id": 1,
+        "title": "Test Product",
+        "image": "http://example.com/image.jpg",
+        "price": 29.99,
+    }
+
+    first = client.get("/products/1")
+    etag = first.headers["ETag"]
+    response = client.get("/products/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_popular_products_follow_favorites(client, user_token, admin_token, test_user, test_admin):
+    """Contadores acompanham favoritos adicionados, removidos e clientes excluídos."""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def fetch(product_id):
+        return {"id": product_id, "title": f"Product {product_id}",
+                "image": "http://example.com/image.jpg", "price": 10.0}
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=fetch):
+        client.post("/favorites/batch", json={"product_ids": [1, 2, 3]}, headers=headers)
+        client.post("/favorites/2", headers=admin_headers)
+        client.delete("/favorites/3", headers=headers)
+
+    popular = client.get("/products/popular", params={"limit": 3}).json()
+    assert [(p["id"], p["favorites_count"]) for p in popular] == [(2, 2), (1, 1), (3, 0)]
+
+    client.delete(f"/clients/{test_user.id}", headers=admin_headers)
+    popular = client.get("/products/popular", params={"limit": 2}).json()
+    assert [(p["id"], p["favorites_count"]) for p in popular] == [(2, 1), (3, 0)]
+
+
+def test_recompute_favorites_count(db_session, async_session_factory, test_user):
+    """Reparo recalcula os contadores a partir da tabela de favoritos."""
+    import asyncio
+    from datetime import datetime
+
+    from produtos_favoritos.models import Favorite, Product
+    from produtos_favoritos.popularity import recompute_favorites_count
+
+    db_session.add(Product(id=1, title="Drifted", image="http://example.com/image.jpg",
+                           price=1.0, last_sync=datetime.utcnow(), favorites_count=42))
+    db_session.add(Favorite(client_id=test_user.id, product_id=1))
+    db_session.commit()
+
+    async def run():
+        async with async_session_factory() as db:
+            await recompute_favorites_count(db)
+
+    asyncio.run(run())
+    db_session.expire_all()
+    assert db_session.get(Product, 1).favorites_count == 1
+
+
+def test_not_found_is_cached(async_session_factory):
+    """Um 404 confirmado na API externa não é buscado de novo dentro do TTL."""
+    import asyncio
+
+    from fastapi import HTTPException
+
+    from produtos_favoritos.products_service import get_or_refresh_product
+
+    async def not_found(product_id):
+        raise HTTPException(
+            status_code=404, detail="Produto não encontrado na API externa")
+
+    async def run():
+        for _ in range(3):
+            async with async_session_factory() as db:
+                with pytest.raises(HTTPException) as exc_info:
+                    await get_or_refresh_product(db, 424242)
+                assert exc_info.value.status_code == 404
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=not_found) as mock_fetch:
+        asyncio.run(run())
+
+    assert mock_fetch.call_count == 1
+
+
+def test_expired_product_served_when_upstream_down(db_session, client):
+    """Com a API externa fora do ar, o produto expirado armazenado continua sendo servido."""
+    from datetime import datetime, timedelta
+
+    import httpx
+
+    from produtos_favoritos.models import Product
+
+    db_session.add(Product(id=1, title="Antigo", image="http://example.com/image.jpg",
+                           price=1.0, last_sync=datetime.utcnow() - timedelta(days=30)))
+    db_session.commit()
+
+    async def down(product_id):
+        raise httpx.ConnectError("sem conexão")
+
+    with patch("produtos_favoritos.products_service.fetch_external_product",
+               side_effect=down):
+        response = client.get("/products/1")
+        missing = client.get("/products/2")
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Antigo"
+    assert missing.status_code == 503
+
+
+def test_open_circuit_skips_upstream(monkeypatch):
+    """Com o circuito aberto, a FakeStore não é chamada e a resposta é 503."""
+    import asyncio
+
+    from produtos_favoritos import products_service
+    from produtos_favoritos.circuit_breaker import CircuitOpenError
+    from produtos_favoritos.http_client import fakestore_breaker
+
+    for _ in range(fakestore_breaker.failure_threshold):
+        fakestore_breaker.record_failure()
+    http = AsyncMock()
+    monkeypatch.setattr(products_service, "get_http_client", lambda: http)
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        asyncio.run(products_service.fetch_external_product(1))
+
+    assert exc_info.value.status_code == 503
+    http.get.assert_not_called()
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_search_products_ranked_and_paginated(mock_fetch, db_session, client):
+    """A busca usa só o catálogo local, casa prefixos e pagina pelo X-Next-Cursor."""
+    from produtos_favoritos.models import Product
+
+    titles = ["Mens Cotton Jacket", "Womens Rain Jacket Jacket",
+              "Slim Fit T-Shirts", "Gold Ring"]
+    for product_id, title in enumerate(titles, start=1):
+        db_session.add(Product(id=product_id, title=title,
+                               image="http://example.com/image.jpg", price=10.0))
+    db_session.commit()
+
+    first = client.get("/products/search", params={"q": "jacket", "limit": 1})
+    assert first.status_code == 200
+    assert [p["id"] for p in first.json()] == [2]
+    second = client.get("/products/search", params={
+        "q": "jacket", "limit": 1, "cursor": first.headers["X-Next-Cursor"]})
+    assert [p["id"] for p in second.json()] == [1]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert [p["id"] for p in client.get("/products/search?q=shir").json()] == [3]
+    assert client.get("/products/search?q=mens+ring").json() == []
+    assert client.get("/products/search", params={"q": '"*'}).json() == []
+    mock_fetch.assert_not_called()
+
+
+def test_search_follows_title_changes(db_session, client):
+    """Os triggers mantêm o índice FTS em dia com inserções, alterações e remoções."""
+    from produtos_favoritos.models import Product
+
+    product = Product(id=1, title="Old Backpack", image="http://example.com/image.jpg", price=5.0)
+    db_session.add(product)
+    db_session.commit()
+    product.title = "New Laptop Sleeve"
+    db_session.commit()
+
+    assert client.get("/products/search?q=backpack").json() == []
+    assert [p["id"] for p in client.get("/products/search?q=laptop").json()] == [1]
+
+    db_session.delete(product)
+    db_session.commit()
+    assert client.get("/products/search?q=laptop").json() == []
+
+
+def test_list_products_sorted_filtered_and_paginated(db_session, client):
+    """A listagem filtra por preço e avaliação, ordena e pagina por cursor keyset."""
+    from produtos_favoritos.models import Product
+
+    for product_id, price, rate in [(1, 10.0, 4.5), (2, 30.0, 3.0), (3, 20.0, None),
+                                    (4, 20.0, 4.9), (5, 50.0, 2.0)]:
+        db_session.add(Product(id=product_id, title=f"Produto {product_id}",
+                               image="http://example.com/image.jpg", price=price,
+                               rating_rate=rate, rating_count=None if rate is None else 10))
+    db_session.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {"sort": "-price", "max_price": 30, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/products/", params=params)
+        assert response.status_code == 200
+        ids += [p["id"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert ids == [2, 4, 3, 1]
+
+    response = client.get("/products/", params={"sort": "-rating", "min_rating": 3})
+    assert [p["id"] for p in response.json()] == [4, 1, 2]
+    assert response.json()[0]["rating_rate"] == 4.9
+    assert [p["id"] for p in client.get("/products/?sort=rating").json()] == [5, 2, 1, 4]
+    assert client.get("/products/?sort=stars").status_code == 422
+    assert client.get("/products/?cursor=bad").status_code == 400
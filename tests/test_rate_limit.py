@@ -0,0 +1,128 @@
+"""Testes do rate limiting por token bucket."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from produtos_favoritos import rate_limit
+from produtos_favoritos.rate_limit import (MemoryRateLimitBackend,
+                                           RateLimitMiddleware, RateLimitRule)
+from produtos_favoritos.security import create_access_token
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def limited_client(monkeypatch):
+    """App mínima com limite de 1 requisição (sem reposição relevante) por chave."""
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(rate_limit, "rate_limit_backend", MemoryRateLimitBackend(100))
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, rules=[
+        RateLimitRule("login", ("/auth/login",), 0.001, 1, by_ip=True),
+        RateLimitRule("default", ("/",), 0.001, 1),
+    ])
+
+    @app.get("/items")
+    def items():
+        return []
+
+    @app.post("/auth/login")
+    def login():
+        return {}
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_login_throttled_per_ip(client, monkeypatch):
+    """Tentativas de login além do burst recebem 429 com Retry-After."""
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", True)
+    burst = rate_limit.settings.rate_limit_login_burst
+    for _ in range(burst):
+        response = client.post("/auth/login", data={"username": "x@example.com", "password": "errada"})
+        assert response.status_code == 401
+    response = client.post("/auth/login", data={"username": "x@example.com", "password": "errada"})
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Muitas requisições, tente novamente em instantes"
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/health").status_code == 200
+
+
+def test_bucket_refills_over_time(clock):
+    """Sem tokens a chamada informa a espera; passado esse tempo volta a passar."""
+    backend = MemoryRateLimitBackend(max_keys=10)
+
+    async def run():
+        assert await backend.hit("k", rate=2, burst=2) == 0
+        assert await backend.hit("k", rate=2, burst=2) == 0
+        retry_after = await backend.hit("k", rate=2, burst=2)
+        assert retry_after == pytest.approx(0.5)
+        clock.now += 0.5
+        assert await backend.hit("k", rate=2, burst=2) == 0
+
+    asyncio.run(run())
+
+
+def test_keys_are_bounded():
+    """Chaves além de max_keys descartam as usadas há mais tempo."""
+    backend = MemoryRateLimitBackend(max_keys=2)
+
+    async def run():
+        for key in ("a", "b", "c"):
+            await backend.hit(key, rate=1, burst=1)
+
+    asyncio.run(run())
+    assert list(backend._buckets) == ["b", "c"]
+
+
+def test_clients_have_independent_buckets(limited_client):
+    """Com token válido o balde é do cliente; sem token, do IP."""
+    first = {"Authorization": f"Bearer {create_access_token('a@example.com', client_id=1)}"}
+    second = {"Authorization": f"Bearer {create_access_token('b@example.com', client_id=2)}"}
+
+    assert limited_client.get("/items", headers=first).status_code == 200
+    assert limited_client.get("/items", headers=first).status_code == 429
+    assert limited_client.get("/items", headers=second).status_code == 200
+    assert limited_client.get("/items").status_code == 200
+    assert limited_client.get("/items", headers={"Authorization": "Bearer invalido"}).status_code == 429
+
+
+def test_login_ignores_token_and_health_is_exempt(limited_client):
+    """O grupo de login é sempre por IP; /health não é limitado."""
+    first = {"Authorization": f"Bearer {create_access_token('a@example.com', client_id=1)}"}
+    assert limited_client.post("/auth/login").status_code == 200
+    assert limited_client.post("/auth/login", headers=first).status_code == 429
+    for _ in range(3):
+        assert limited_client.get("/health").status_code == 200
+
+
+def test_token_verified_once_per_request(client, user_token, monkeypatch):
+    """As claims verificadas pelo rate limiting são reaproveitadas pela autenticação."""
+    from unittest.mock import patch
+
+    from produtos_favoritos import security
+
+    monkeypatch.setattr(rate_limit.settings, "rate_limit_enabled", True)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    with patch.object(security.jwt, "decode", wraps=security.jwt.decode) as decode:
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        assert client.get("/auth/me", headers={"Authorization": "Bearer invalido"}).status_code == 401
+    assert decode.call_count == 2
@@ -0,0 +1,108 @@
+"""Testes do roteamento de leituras para réplicas."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+
+from produtos_favoritos import database
+from produtos_favoritos.database import Base, ReplicaRouter
+from produtos_favoritos.models import Client
+
+
+@pytest.fixture
+def replica_url(tmp_path):
+    """Segundo banco SQLite fazendo papel de réplica (sem replicação real)."""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Client.__table__.insert(), {
+            "name": "Só na réplica", "email": "replica@example.com",
+            "password_hash": "x", "role": "user"})
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def use_replicas(monkeypatch):
+    routers = []
+
+    def use(*urls):
+        router = ReplicaRouter(list(urls), check_interval=60)
+        routers.append(router)
+        monkeypatch.setattr(database, "_replica_router", router)
+        return router
+
+    yield use
+    for router in routers:
+        asyncio.run(router.dispose())
+
+
+def test_list_clients_reads_from_replica(client, admin_token, replica_url, use_replicas):
+    """Listagem de clientes é servida pela réplica."""
+    use_replicas(replica_url)
+    response = client.get("/clients/", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert [c["email"] for c in response.json()] == ["replica@example.com"]
+
+
+def test_unhealthy_replica_falls_back_to_primary(client, admin_token, tmp_path, use_replicas):
+    """Réplica que falha no health check sai do rodízio e a leitura vai para o primário."""
+    use_replicas(f"sqlite:///{tmp_path / 'inexistente' / 'replica.db'}")
+    response = client.get("/clients/", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert [c["email"] for c in response.json()] == ["admin@example.com"]
+
+
+def test_replicas_round_robin(replica_url, tmp_path, use_replicas):
+    """Réplicas saudáveis são usadas alternadamente."""
+    other = f"sqlite:///{tmp_path / 'replica2.db'}"
+    router = use_replicas(replica_url, other)
+
+    async def picks():
+        return [await router.pick() for _ in range(4)]
+
+    first, second, third, fourth = asyncio.run(picks())
+    assert first is third and second is fourth and first is not second
+
+
+def test_unresponsive_replica_times_out(replica_url, monkeypatch):
+    """Réplica que não responde ao health check sai do rodízio após o timeout, e
+    leituras simultâneas não a recebem enquanto o check está pendente."""
+    router = ReplicaRouter([replica_url], check_interval=60, check_timeout=0.05)
+
+    async def hang(index):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(router, "_probe", hang)
+
+    async def picks():
+        probing = asyncio.create_task(router.pick())
+        await asyncio.sleep(0)
+        concurrent = await router.pick()
+        return concurrent, await asyncio.wait_for(probing, 1)
+
+    try:
+        assert asyncio.run(picks()) == (None, None)
+    finally:
+        asyncio.run(router.dispose())
+
+
+@patch("produtos_favoritos.products_service.fetch_external_product")
+def test_favorites_read_your_writes(mock_fetch, client, user_token, replica_url, use_replicas, monkeypatch):
+    """Logo após alterar os favoritos, a listagem lê do primário; depois da janela, da réplica."""
+    from produtos_favoritos import routers_favorites
+
+    mock_fetch.return_value = {"id": 1, "title": "Produto", "image": "http://example.com/image.jpg",
+                               "price": 10.0}
+    use_replicas(replica_url)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert client.post("/favorites/1", headers=headers).status_code == 201
+
+    response = client.get("/favorites/", headers=headers)
+    assert [f["product"]["id"] for f in response.json()] == [1]
+
+    monkeypatch.setattr(routers_favorites.settings, "replica_read_your_writes_seconds", 0)
+    response = client.get("/favorites/", headers=headers)
+    assert response.json() == []